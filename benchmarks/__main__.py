@@ -0,0 +1,121 @@
+"""
+Runs all benchmarks. Results can be written as JSON and compared against the JSON of
+an earlier run, e.g. before upgrading cqdf or cadquery:
+
+    python -m benchmarks -o baseline.json
+    python -m benchmarks -b baseline.json
+"""
+
+import json
+import platform
+import sys
+from argparse import ArgumentParser
+from pathlib import Path
+from typing import Any
+
+import cadquery as cq
+from cqdf import __version__
+from rich import print as richprint
+from rich.table import Table
+
+from . import assembly, driver, serialize
+
+Results = list[dict[str, str | float | int]]
+
+SUITES = {
+    "serialize": serialize,
+    "assembly": assembly,
+    "driver": driver,
+}
+
+
+def _key(result: dict[str, Any]) -> tuple[tuple[str, Any], ...]:
+    """Identifies a measurement by its textual values, e.g. shape and codec"""
+    return tuple((k, v) for k, v in result.items() if isinstance(v, str))
+
+
+def compare(suites: dict[str, Results], baseline: dict[str, Results], threshold: float):
+    """
+    Lists every timing of `suites` next to the same timing in `baseline`. Returns the
+    table and whether any timing got slower by more than `threshold` (relative).
+    """
+    table = Table(title="Comparison with baseline")
+    for column in ("Suite", "Case", "Timing", "Baseline", "Current", "Change"):
+        table.add_column(column)
+
+    regressed = False
+    for suite, results in suites.items():
+        previous = {_key(r): r for r in baseline.get(suite, [])}
+        for result in results:
+            if (old := previous.get(_key(result))) is None:
+                continue
+            case = ", ".join(str(v) for k, v in _key(result))
+            for timing in (k for k in result if k.endswith("_s") and k in old):
+                change = float(result[timing]) / float(old[timing]) - 1
+                style = ""
+                if change > threshold:
+                    style = "red"
+                    regressed = True
+                elif change < -threshold:
+                    style = "green"
+                table.add_row(
+                    suite,
+                    case,
+                    timing.removesuffix("_s"),
+                    f"{float(old[timing]) * 1e3:.2f} ms",
+                    f"{float(result[timing]) * 1e3:.2f} ms",
+                    f"{change:+.1%}",
+                    style=style,
+                )
+    return table, regressed
+
+
+parser = ArgumentParser("benchmarks", description="CQDF benchmarks")
+parser.add_argument(
+    "suites",
+    nargs="*",
+    default=list(SUITES),
+    help=f"Suites to run, any of {', '.join(SUITES)} (default: all)",
+)
+parser.add_argument("-r", "--repeat", type=int, default=5, help="Runs per case")
+parser.add_argument("-o", "--out", type=Path, help="Write the results as JSON")
+parser.add_argument("-b", "--baseline", type=Path, help="JSON results to compare to")
+parser.add_argument(
+    "-t",
+    "--threshold",
+    type=float,
+    default=0.1,
+    help="Relative slowdown reported as regression (default: 0.1)",
+)
+args = parser.parse_args()
+if unknown := set(args.suites) - set(SUITES):
+    parser.error(f"Unknown suites: {', '.join(unknown)}")
+
+suites: dict[str, Results] = {}
+for name in args.suites:
+    suites[name] = SUITES[name].run(args.repeat)
+    richprint(SUITES[name].describe(suites[name]))
+
+if args.out:
+    args.out.write_text(
+        json.dumps(
+            {
+                "environment": {
+                    "cqdf": __version__,
+                    "cadquery": cq.__version__,
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                },
+                "suites": suites,
+            },
+            indent=2,
+        )
+    )
+
+if args.baseline:
+    baseline = json.loads(args.baseline.read_text())
+    table, regressed = compare(suites, baseline["suites"], args.threshold)
+    richprint(f"Baseline: {baseline['environment']}")
+    richprint(table)
+    if regressed:
+        sys.exit(1)
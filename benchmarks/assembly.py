@@ -0,0 +1,77 @@
+"""
+Measures how pickling assemblies scales with the number of instances of one part.
+Payload size and decode time should follow the unique geometry, not the instances.
+Run with `python -m benchmarks.assembly`.
+"""
+
+import pickle
+import timeit
+
+import cadquery as cq
+from cqdf.cq_serialize import register
+from rich import print as richprint
+from rich.table import Table
+
+INSTANCES = (1, 10, 100, 1000)
+
+
+def bolt() -> cq.Shape:
+    return (
+        cq.Workplane()
+        .polygon(6, 10)
+        .extrude(4)
+        .faces(">Z")
+        .workplane()
+        .circle(3)
+        .extrude(20)
+        .val()  # type: ignore
+    )
+
+
+def bolted_plate(instances: int) -> cq.Assembly:
+    part = bolt()
+    assembly = cq.Assembly(
+        cq.Workplane().box(instances * 15, 15, 2).val(), name="plate"
+    )
+    for i in range(instances):
+        assembly.add(part, name=f"bolt_{i}", loc=cq.Location(cq.Vector(i * 15, 0, 1)))
+    return assembly
+
+
+def run(repeat: int = 5):
+    register()
+    results: list[dict[str, str | float | int]] = []
+    for instances in INSTANCES:
+        assembly = bolted_plate(instances)
+        data = pickle.dumps(assembly)
+        encode = min(
+            timeit.repeat(lambda: pickle.dumps(assembly), number=1, repeat=repeat)
+        )
+        decode = min(timeit.repeat(lambda: pickle.loads(data), number=1, repeat=repeat))
+        results.append(
+            {
+                "assembly": f"{instances} bolts",
+                "encode_s": encode,
+                "decode_s": decode,
+                "bytes": len(data),
+            }
+        )
+    return results
+
+
+def describe(results: list[dict[str, str | float | int]]):
+    table = Table(title="Assembly serialization")
+    for column in ("Assembly", "Encode", "Decode", "Size"):
+        table.add_column(column)
+    for r in results:
+        table.add_row(
+            str(r["assembly"]),
+            f"{r['encode_s'] * 1e3:.2f} ms",
+            f"{r['decode_s'] * 1e3:.2f} ms",
+            f"{int(r['bytes']) / 1024:.1f} KiB",
+        )
+    return table
+
+
+if __name__ == "__main__":
+    richprint(describe(run()))
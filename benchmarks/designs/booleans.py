@@ -0,0 +1,28 @@
+import cadquery as cq
+from cqdf.design import finish, user_input
+from cqdf.parameter import DesignParameters, Numeric, Range, Unit
+
+
+class BooleanParams(DesignParameters):
+    holes = Range(1, 50, 20, description="Holes along each side")
+    pitch = Numeric(5, unit=Unit.mm)
+    diameter = Numeric(2, unit=Unit.mm)
+    thickness = Numeric(2, unit=Unit.mm)
+
+
+params = user_input(BooleanParams)
+
+holes = int(params.holes.value)
+pitch = params.pitch.value
+plate = cq.Workplane().box(holes * pitch, holes * pitch, params.thickness.value)
+
+# Cut the holes one by one, every cut is a separate boolean operation
+for x in range(holes):
+    for y in range(holes):
+        plate = plate.cut(
+            cq.Workplane()
+            .center((x - (holes - 1) / 2) * pitch, (y - (holes - 1) / 2) * pitch)
+            .cylinder(params.thickness.value, params.diameter.value / 2)
+        )
+
+finish(plate.val())  # type: ignore
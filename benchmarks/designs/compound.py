@@ -0,0 +1,26 @@
+import cadquery as cq
+from cqdf.design import finish, user_input
+from cqdf.parameter import DesignParameters, Numeric, Range, Unit
+
+
+class CompoundParams(DesignParameters):
+    count = Range(1, 100, 30, description="Spheres along each axis")
+    radius = Numeric(1, unit=Unit.mm)
+    pitch = Numeric(3, unit=Unit.mm)
+
+
+params = user_input(CompoundParams)
+
+count = int(params.count.value)
+result = cq.Compound.makeCompound(
+    [
+        cq.Solid.makeSphere(
+            params.radius.value,
+            cq.Vector(x * params.pitch.value, y * params.pitch.value, 0),
+        )
+        for x in range(count)
+        for y in range(count)
+    ]
+)
+
+finish(result)
@@ -0,0 +1,23 @@
+import cadquery as cq
+from cqdf.design import finish, user_input
+from cqdf.parameter import DesignParameters, Numeric, Text, Unit
+
+
+class TextParams(DesignParameters):
+    string = Text("The quick brown fox jumps over the lazy dog")
+    size = Numeric(10, unit=Unit.mm)
+    thickness = Numeric(2, unit=Unit.mm)
+    lines = Numeric(5, description="Lines of text")
+
+
+params = user_input(TextParams)
+
+result = cq.Workplane()
+for line in range(int(params.lines.value)):
+    result = result.union(
+        cq.Workplane()
+        .center(0, -line * params.size.value * 1.5)
+        .text(params.string.value, params.size.value, params.thickness.value)
+    )
+
+finish(result.val())  # type: ignore
@@ -0,0 +1,131 @@
+"""
+Measures the latency of evaluating designs through the driver: a cold session per
+evaluation, started from a fresh interpreter, a warm session reused between
+evaluations, `start_params` through the worker and from the schema cache, and a full
+`execute` including the STEP export. Run with `python -m benchmarks.driver`.
+"""
+
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from cqdf import schema
+from cqdf.driver import Evaluation, Session
+from cqdf.interface import ExportTarget
+from rich import print as richprint
+from rich.table import Table
+
+ROOT = Path(__file__).parent.parent
+
+DESIGNS: dict[str, Path] = {
+    "all": ROOT / "samples" / "all.py",
+    "nametag": ROOT / "samples" / "nametag.py",
+    "compound": ROOT / "benchmarks" / "designs" / "compound.py",
+    "booleans": ROOT / "benchmarks" / "designs" / "booleans.py",
+    "text": ROOT / "benchmarks" / "designs" / "text.py",
+}
+
+
+class ColdSession(Session):
+    """
+    Starts its worker from a fresh interpreter. A forked worker would inherit the
+    modules the benchmarks already imported, CadQuery in particular.
+    """
+
+    context = multiprocessing.get_context("spawn")
+
+
+def cold(path: Path):
+    with ColdSession() as session:
+        evaluation = Evaluation(path, session)
+        evaluation.start()
+        evaluation.finish([])
+
+
+def warm(session: Session) -> Callable[[Path], None]:
+    def evaluate(path: Path):
+        evaluation = Evaluation(path, session)
+        evaluation.start()
+        evaluation.finish([])
+
+    return evaluate
+
+
+def params(session: Session) -> Callable[[Path], None]:
+    """
+    Runs the design until it provides its parameters, as `start_params` does when
+    neither the schema cache nor the static parser know them
+    """
+
+    def evaluate(path: Path):
+        schema._schemas.clear()
+        Evaluation(path, session).start()
+        session.abort()
+
+    return evaluate
+
+
+def cached(session: Session) -> Callable[[Path], None]:
+    def evaluate(path: Path):
+        Evaluation(path, session).start_params()
+
+    return evaluate
+
+
+def execute(session: Session, directory: Path) -> Callable[[Path], None]:
+    def evaluate(path: Path):
+        evaluation = Evaluation(path, session)
+        evaluation.start()
+        evaluation.finish([], [ExportTarget(directory / f"{path.stem}.step")])
+
+    return evaluate
+
+
+def measure(evaluate: Callable[[Path], None], path: Path, repeat: int) -> float:
+    times: list[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        evaluate(path)
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def run(repeat: int = 5, designs: dict[str, Path] = DESIGNS):
+    results: list[dict[str, str | float | int]] = []
+    with Session() as session, tempfile.TemporaryDirectory() as tmp:
+        for name, path in designs.items():
+            modes: dict[str, Callable[[Path], None]] = {
+                "cold": cold,
+                "warm": warm(session),
+                "params": params(session),
+                "cached": cached(session),
+                "execute": execute(session, Path(tmp)),
+            }
+            for mode, evaluate in modes.items():
+                results.append(
+                    {
+                        "design": name,
+                        "mode": mode,
+                        "time_s": measure(evaluate, path, repeat),
+                    }
+                )
+    return results
+
+
+def describe(results: list[dict[str, str | float | int]]):
+    table = Table(title="Driver latency")
+    for column in ("Design", "Mode", "Time"):
+        table.add_column(column)
+    for r in results:
+        table.add_row(
+            str(r["design"]),
+            str(r["mode"]),
+            f"{r['time_s'] * 1e3:.2f} ms",
+        )
+    return table
+
+
+if __name__ == "__main__":
+    richprint(describe(run()))
@@ -0,0 +1,109 @@
+"""
+Compares encode/decode time, throughput and payload size of the shape codecs in
+`cqdf.cq_serialize` for shapes of increasing size.
+Run with `python -m benchmarks.serialize`.
+"""
+
+import timeit
+from typing import Callable
+
+import cadquery as cq
+from cqdf.cq_serialize import Codec, Compression, dump_shape, load_shape
+from rich import print as richprint
+from rich.table import Table
+
+
+def box() -> cq.Shape:
+    return cq.Workplane().box(10, 10, 10).val()  # type: ignore
+
+
+def perforated_plate() -> cq.Shape:
+    return (
+        cq.Workplane()
+        .box(200, 200, 2)
+        .faces(">Z")
+        .workplane()
+        .rarray(5, 5, 35, 35)
+        .hole(2)
+        .val()  # type: ignore
+    )
+
+
+def sphere_compound() -> cq.Shape:
+    return cq.Compound.makeCompound(
+        [
+            cq.Solid.makeSphere(1, cq.Vector(x * 3, y * 3, 0))
+            for x in range(30)
+            for y in range(30)
+        ]
+    )
+
+
+SHAPES: dict[str, Callable[[], cq.Shape]] = {
+    "box": box,
+    "perforated_plate": perforated_plate,
+    "sphere_compound": sphere_compound,
+}
+
+
+def measure(shape: cq.Shape, codec: Codec, compression: Compression, repeat: int):
+    data = dump_shape(shape, codec, compression)
+    encode = min(
+        timeit.repeat(
+            lambda: dump_shape(shape, codec, compression), number=1, repeat=repeat
+        )
+    )
+    decode = min(timeit.repeat(lambda: load_shape(data), number=1, repeat=repeat))
+    return encode, decode, len(data)
+
+
+def run(repeat: int = 5):
+    results: list[dict[str, str | float | int]] = []
+    for name, factory in SHAPES.items():
+        shape = factory()
+        for codec in Codec:
+            for compression in Compression:
+                encode, decode, size = measure(shape, codec, compression, repeat)
+                results.append(
+                    {
+                        "shape": name,
+                        "faces": len(shape.Faces()),
+                        "codec": codec.name,
+                        "compression": compression.name,
+                        "encode_s": encode,
+                        "decode_s": decode,
+                        "bytes": size,
+                    }
+                )
+    return results
+
+
+def describe(results: list[dict[str, str | float | int]]):
+    table = Table(title="Shape serialization")
+    columns = ("Shape", "Faces", "Codec", "Compression", "Encode", "Decode", "Size")
+    for column in (*columns, "Throughput"):
+        table.add_column(column)
+    for r in results:
+        # Throughput of a round trip, relative to the uncompressed text BREP size
+        text_size = next(
+            int(o["bytes"])
+            for o in results
+            if o["shape"] == r["shape"]
+            and o["codec"] == Codec.text.name
+            and o["compression"] == Compression.none.name
+        )
+        table.add_row(
+            str(r["shape"]),
+            str(r["faces"]),
+            str(r["codec"]),
+            str(r["compression"]),
+            f"{r['encode_s'] * 1e3:.2f} ms",
+            f"{r['decode_s'] * 1e3:.2f} ms",
+            f"{int(r['bytes']) / 1024:.1f} KiB",
+            f"{text_size / (r['encode_s'] + r['decode_s']) / 2**20:.1f} MiB/s",
+        )
+    return table
+
+
+if __name__ == "__main__":
+    richprint(describe(run()))
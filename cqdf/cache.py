@@ -0,0 +1,217 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import cache
+from importlib.metadata import version
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Sequence
+
+from . import __version__ as cqdf_version
+from .cq_serialize import Compression, dump_shape, load_shape
+from .interface import ParameterValue, ParameterValueResponse
+from .parameter import VType
+from .util import file_hash
+
+if TYPE_CHECKING:
+    from cadquery import Shape
+
+
+@cache
+def _cadquery_version() -> str:
+    # Read from the package metadata, importing CadQuery takes seconds
+    return version("cadquery")
+
+
+def canonical_values(
+    parameters: Sequence[ParameterValue], res_params: Sequence[ParameterValueResponse]
+) -> list[tuple[str, Any]]:
+    """
+    Returns the effective value of every parameter, sorted by key.
+    Parameters missing in the response keep their default, so an explicit default
+    and an omitted parameter produce the same result.
+    """
+    values = {p.key: p.value.value for p in parameters}
+    vtypes = {p.key: p.value.vtype for p in parameters}
+    for res_param in res_params:
+        values[res_param.key] = res_param.value
+
+    return [
+        (
+            key,
+            float(value)
+            if vtypes.get(key) == VType.Float and isinstance(value, int)
+            else value,
+        )
+        for key, value in sorted(values.items())
+    ]
+
+
+def result_key(
+    path: Path,
+    parameters: Sequence[ParameterValue],
+    res_params: Sequence[ParameterValueResponse],
+) -> str:
+    """
+    Builds the cache key of an evaluation from the design content, its effective
+    parameter values and the library versions
+    """
+    payload = json.dumps(
+        [
+            file_hash(path),
+            [
+                (k, type(v).__name__, v)
+                for k, v in canonical_values(parameters, res_params)
+            ],
+            cqdf_version,
+            _cadquery_version(),
+        ],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Caches evaluation results as BREP bytes, in memory and optionally on disk.
+    Both stores are bounded in bytes and evict the least recently used entry first.
+    Concurrent requests for the same key are collapsed into a single evaluation.
+    Entries are compressed with zlib unless specified otherwise.
+    """
+
+    def __init__(
+        self,
+        directory: Path | None = None,
+        memory_size: int = 256 * 2**20,
+        disk_size: int = 2 * 2**30,
+        compression: Compression = Compression.zlib,
+    ) -> None:
+        self.directory = directory
+        self.memory_size = memory_size
+        self.disk_size = disk_size
+        self.compression = compression
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._memory_used = 0
+        self._inflight: dict[str, Future["Shape | None"]] = {}
+        self._lock = threading.Lock()
+
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        assert self.directory is not None
+        return self.directory / f"{key}.brep"
+
+    def _remember(self, key: str, data: bytes):
+        if len(data) > self.memory_size:
+            return
+        if key in self._memory:
+            self._memory_used -= len(self._memory.pop(key))
+        self._memory[key] = data
+        self._memory_used += len(data)
+        while self._memory_used > self.memory_size:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_used -= len(evicted)
+
+    def _read(self, key: str) -> bytes | None:
+        with self._lock:
+            if (data := self._memory.get(key)) is not None:
+                self._memory.move_to_end(key)
+                return data
+
+        if self.directory is None:
+            return None
+        try:
+            data = self._path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+        # Reading refreshes the entry's position in the disk LRU
+        os.utime(self._path(key))
+        with self._lock:
+            self._remember(key, data)
+        return data
+
+    def _write(self, key: str, data: bytes):
+        with self._lock:
+            self._remember(key, data)
+
+        if self.directory is None:
+            return
+        tmp = self._path(key).with_suffix(f".{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        tmp.replace(self._path(key))
+        self._evict_disk()
+
+    def _evict_disk(self):
+        assert self.directory is not None
+        entries: list[tuple[float, int, Path]] = []
+        for entry in self.directory.glob("*.brep"):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+
+        used = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries):
+            if used <= self.disk_size:
+                break
+            entry.unlink(missing_ok=True)
+            used -= size
+
+    def get(self, key: str) -> "Shape | None":
+        """Returns the cached shape or None on a miss"""
+        data = self._read(key)
+        return None if data is None else load_shape(data)
+
+    def put(self, key: str, shape: "Shape"):
+        self._write(key, dump_shape(shape, compression=self.compression))
+
+    def get_or_evaluate(
+        self, key: str, evaluate: Callable[[], "Shape | None"]
+    ) -> "Shape | None":
+        """
+        Returns the cached shape for `key`, or calls `evaluate` and caches its result.
+        While an evaluation for `key` is running, other callers wait for its result.
+        """
+        if (shape := self.get(key)) is not None:
+            return shape
+
+        with self._lock:
+            # An evaluation may have stored the result since the miss above
+            data = self._memory.get(key)
+            future = self._inflight.get(key)
+            owner = data is None and future is None
+            if data is not None:
+                self._memory.move_to_end(key)
+            elif future is None:
+                future = self._inflight[key] = Future()
+
+        if data is not None:
+            return load_shape(data)
+        if not owner:
+            return future.result()
+
+        try:
+            shape = evaluate()
+            if shape is not None:
+                self.put(key, shape)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(shape)
+            return shape
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_used = 0
+        if self.directory is not None:
+            for entry in self.directory.glob("*.brep"):
+                entry.unlink(missing_ok=True)
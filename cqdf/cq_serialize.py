@@ -22,41 +22,207 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
-
 import copyreg
+import lzma
+import zlib
+from enum import Enum
 from io import BytesIO
+from typing import TYPE_CHECKING, Any, Callable
 
-import cadquery as cq
-import OCP
+# CadQuery and OCP are imported on first use, so that processes which only pass
+# serialized shapes around do not have to load them
+if TYPE_CHECKING:
+    import cadquery as cq
+    import OCP
 
 
-def _inflate_shape(data: bytes):
-    with BytesIO(data) as bio:
-        return cq.Shape.importBrep(bio)
+class Codec(Enum):
+    """Shape encodings"""
+
+    text = 0
+    binary = 1
+
+
+class Compression(Enum):
+    none = 0
+    zlib = 1
+    lzma = 2
+
+
+# Tagged payloads start with a NUL byte, which never begins a text BREP.
+# Untagged payloads are text BREP as written by earlier versions.
+_MAGIC = b"\x00CQ"
 
+_compressors: dict[
+    Compression, tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]
+] = {
+    Compression.none: (bytes, bytes),
+    Compression.zlib: (lambda b: zlib.compress(b, 1), zlib.decompress),
+    Compression.lzma: (lzma.compress, lzma.decompress),
+}
+
+_codec = Codec.binary
+_compression = Compression.none
+_registered = False
+
+
+def _encode(shape: "cq.Shape", codec: Codec) -> bytes:
+    from OCP.BinTools import BinTools
 
-def _reduce_shape(shape: cq.Shape):
     with BytesIO() as stream:
-        shape.exportBrep(stream)
-        return _inflate_shape, (stream.getvalue(),)
+        if codec == Codec.binary:
+            BinTools.Write_s(shape.wrapped, stream)
+        else:
+            shape.exportBrep(stream)
+        return stream.getvalue()
+
+
+def _decode(data: bytes, codec: Codec) -> "cq.Shape":
+    import cadquery as cq
+    from OCP.BinTools import BinTools
+    from OCP.TopoDS import TopoDS_Shape
+
+    with BytesIO(data) as stream:
+        if codec == Codec.binary:
+            shape = TopoDS_Shape()
+            BinTools.Read_s(shape, stream)
+            return cq.Shape.cast(shape)
+        return cq.Shape.importBrep(stream)
+
+
+def dump_shape(
+    shape: "cq.Shape",
+    codec: Codec | None = None,
+    compression: Compression | None = None,
+) -> bytes:
+    """
+    Serializes a shape to tagged bytes, using the registered codec and compression
+    unless specified.
+    """
+    codec = _codec if codec is None else codec
+    compression = _compression if compression is None else compression
+    compress, _ = _compressors[compression]
+    return (
+        _MAGIC
+        + bytes((codec.value, compression.value))
+        + compress(_encode(shape, codec))
+    )
+
+
+def load_shape(data: bytes) -> "cq.Shape":
+    """
+    Restores a shape from bytes produced by `dump_shape` or from a plain text BREP.
+    """
+    if not data.startswith(_MAGIC):
+        return _decode(data, Codec.text)
+
+    codec, compression = data[len(_MAGIC)], data[len(_MAGIC) + 1]
+    _, decompress = _compressors[Compression(compression)]
+    return _decode(decompress(data[len(_MAGIC) + 2 :]), Codec(codec))
+
+
+def _inflate_shape(data: bytes):
+    return load_shape(data)
+
+
+def _reduce_shape(shape: "cq.Shape"):
+    return _inflate_shape, (dump_shape(shape),)
 
 
 def _inflate_transform(*values: float):
-    trsf = OCP.gp.gp_Trsf()
+    from OCP.gp import gp_Trsf
+
+    trsf = gp_Trsf()
     trsf.SetValues(*values)
     return trsf
 
 
-def _reduce_transform(transform: OCP.gp.gp_Trsf):
+def _reduce_transform(transform: "OCP.gp.gp_Trsf"):
     return _inflate_transform, tuple(
         transform.Value(i, j) for i in range(1, 4) for j in range(1, 5)
     )
 
 
-def register():
+def _children(compound: "cq.Shape") -> "list[cq.Shape]":
+    import cadquery as cq
+    from OCP.TopoDS import TopoDS_Iterator
+
+    children: list[cq.Shape] = []
+    iterator = TopoDS_Iterator(compound.wrapped)
+    while iterator.More():
+        children.append(cq.Shape.cast(iterator.Value()))
+        iterator.Next()
+    return children
+
+
+def _inflate_assembly(data: bytes, nodes: list[tuple[Any, ...]]):
+    import cadquery as cq
+
+    shapes = iter(_children(load_shape(data)))
+    assemblies: list[cq.Assembly] = []
+    for parent, name, loc, color, metadata, count in nodes:
+        node_shapes = [next(shapes) for _ in range(count)]
+        obj: cq.Shape | cq.Workplane | None = None
+        if count == 1:
+            obj = node_shapes[0]
+        elif count > 1:
+            obj = cq.Workplane().add(node_shapes)
+        color = None if color is None else cq.Color(*color)
+        if parent is None:
+            assembly = cq.Assembly(
+                obj, loc=loc, name=name, color=color, metadata=metadata
+            )
+        else:
+            assemblies[parent].add(
+                obj, loc=loc, name=name, color=color, metadata=metadata
+            )
+            assembly = assemblies[parent].children[-1]
+        assemblies.append(assembly)
+    return assemblies[0]
+
+
+def _reduce_assembly(assembly: "cq.Assembly"):
+    """
+    Pickles the assembly tree with the shapes of all its parts in a single compound.
+    BREP writes every underlying TShape once and refers to it with a location, so
+    a part instanced many times is sent and restored once, sharing its geometry.
+    Parts added as workplanes are restored as workplanes of their shapes.
+    Constraints are not kept, the solved locations are.
+    """
+    import cadquery as cq
+
+    nodes: list[tuple[Any, ...]] = []
+    shapes: list[cq.Shape] = []
+    pending: list[tuple[int | None, cq.Assembly]] = [(None, assembly)]
+    while pending:
+        parent, node = pending.pop(0)
+        nodes.append(
+            (
+                parent,
+                node.name,
+                node.loc,
+                None if node.color is None else node.color.toTuple(),
+                node.metadata,
+                len(node.shapes),
+            )
+        )
+        shapes.extend(node.shapes)
+        pending.extend((len(nodes) - 1, child) for child in node.children)
+    return _inflate_assembly, (dump_shape(cq.Compound.makeCompound(shapes)), nodes)
+
+
+def register(codec: Codec = Codec.binary, compression: Compression = Compression.none):
     """
     Registers pickle support functions for common CadQuery and OCCT objects.
+    Shapes are pickled with the given codec and compression.
     """
+    import cadquery as cq
+    from OCP.gp import gp_Trsf
+
+    global _codec, _compression, _registered
+    _codec = codec
+    _compression = compression
+    _registered = True
 
     for cls in (
         cq.Edge,
@@ -70,7 +236,8 @@ def register():
         copyreg.pickle(cls, _reduce_shape)
 
     copyreg.pickle(cq.Vector, lambda vec: (cq.Vector, vec.toTuple()))
-    copyreg.pickle(OCP.gp.gp_Trsf, _reduce_transform)
+    copyreg.pickle(gp_Trsf, _reduce_transform)
     copyreg.pickle(
         cq.Location, lambda loc: (cq.Location, (loc.wrapped.Transformation(),))
     )
+    copyreg.pickle(cq.Assembly, _reduce_assembly)
@@ -1,43 +1,193 @@
+import cProfile
+import hashlib
 import os
 import sys
-from importlib import import_module, reload
+import time
+import traceback
+from collections import OrderedDict
+from dataclasses import dataclass
+from enum import Enum
+from functools import wraps
 from multiprocessing.connection import Connection
 from multiprocessing.queues import SimpleQueue
 from pathlib import Path
-from typing import NoReturn, TypeVar
+from types import BuiltinFunctionType, CodeType, FunctionType, ModuleType
+from typing import TYPE_CHECKING, Any, Callable, NoReturn, ParamSpec, TypeVar
 
-from cadquery import Shape, exporters
+from . import cq_serialize
+from .interface import (
+    EndOfParts,
+    EvaluationRequest,
+    ExportTarget,
+    ParameterValueResponse,
+    Part,
+    Schema,
+    SchemaMiss,
+    WorkerReport,
+    apply_response,
+    make_parameter,
+)
+from .metrics import Metric, measure
+from .parameter import DesignParameters, Value, _read_trackers  # type: ignore
+from .schema import schema_digest
+from .transport import DEFAULT_SHM_THRESHOLD, dumps, send, send_bytes
+from .util import file_hash
 
-from .interface import ParameterValueResponse, apply_response, make_parameter
-from .parameter import DesignParameters, Value
+# Imported when needed, designs without a result never load CadQuery
+if TYPE_CHECKING:
+    from cadquery import Shape
 
 _child_connection: Connection | None = None
 _is_dev: bool = True
+_shm_threshold: int | None = DEFAULT_SHM_THRESHOLD
+_exports: list[ExportTarget] = []
+_meshes: list[tuple[float, float]] = []
+_metrics: list[Metric] = []
+_stream: bool = False
+_parts: list[Part] = []
+
+_report: bool = False
+_timings: dict[str, float] = {}
+_phase_start: float = 0.0
+_profiler: cProfile.Profile | None = None
+
+_sent_schemas: set[str] = set()
+"""Digests of the schemas the driver received from this worker"""
+
+_current_keys: dict[int, str] = {}
+_current_values: dict[str, Value[Any]] = {}
 
 
 class TerminateEvaluationException(Exception):
     ...
 
 
-def _load_design(paths: SimpleQueue[Path], connection: Connection):  # type: ignore
+@dataclass
+class DesignFailure:
+    """Sent to the driver instead of a result when the design raised"""
+
+    message: str
+
+
+class _Design:
+    """
+    A design loaded in the worker. The script is compiled once per content hash and
+    runs in its own module namespace. Modules it imports from its directory are kept
+    with the design and only visible in `sys.modules` while it runs, so designs with
+    equally named files or helpers do not collide.
+    """
+
+    def __init__(self, path: Path, digest: str) -> None:
+        self.path = path
+        self.digest = digest
+        self.code: CodeType = compile(path.read_bytes(), str(path), "exec")
+        # Stable per path, so `step` results survive edits of the design
+        name = f"cqdf_design_{hashlib.sha256(str(path).encode()).hexdigest()[:16]}"
+        self.module = ModuleType(name)
+        self.module.__file__ = str(path)
+        self.local_modules: dict[str, ModuleType] = {}
+        self.local_digests: dict[str, str] = {}
+
+    def _locals_changed(self) -> bool:
+        for file, digest in self.local_digests.items():
+            try:
+                if file_hash(Path(file)) != digest:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def run(self):
+        if self._locals_changed():
+            self.local_modules = {}
+            self.local_digests = {}
+
+        directory = str(self.path.parent)
+        sys.path.insert(0, directory)
+        sys.modules.update(self.local_modules)
+        sys.modules[self.module.__name__] = self.module
+        before = set(sys.modules)
+        try:
+            exec(self.code, self.module.__dict__)
+        finally:
+            sys.path.remove(directory)
+            for name in set(sys.modules) - before:
+                module = sys.modules[name]
+                file = getattr(module, "__file__", None)
+                if file and Path(file).is_relative_to(directory):
+                    self.local_modules[name] = module
+                    self.local_digests[file] = file_hash(Path(file))
+            for name in self.local_modules:
+                sys.modules.pop(name, None)
+            del sys.modules[self.module.__name__]
+
+
+_designs: dict[Path, _Design] = {}
+
+
+def _run_design(path: Path):
+    """Runs the design at `path`, recompiling it only if its content changed"""
+    digest = file_hash(path)
+    design = _designs.get(path)
+    if design is None or design.digest != digest:
+        design = _designs[path] = _Design(path, digest)
+    design.run()
+
+
+def _load_design(  # type: ignore
+    paths: SimpleQueue[Path],
+    connection: Connection,
+    shm_threshold: int | None = DEFAULT_SHM_THRESHOLD,
+):
     """
     Entry for sub-process when evaluating a design through the driver
     """
-    global _child_connection, _is_dev
+    global _child_connection, _is_dev, _shm_threshold
+    global _timings, _phase_start, _profiler
     _child_connection = connection
     _is_dev = False
-
-    module = None
+    _shm_threshold = shm_threshold
+    # Keep the codec if the driver registered one before forking
+    if not cq_serialize._registered:  # type: ignore
+        cq_serialize.register()
 
     while path := paths.get().absolute():
-        sys.path.append(str(path.parent))
+        _timings = {}
+        _phase_start = time.perf_counter()
         try:
-            if module is None:
-                module = import_module(path.stem)
-            else:
-                reload(module)
+            _run_design(path)
         except TerminateEvaluationException:
             continue
+        except Exception:
+            connection.send(DesignFailure(traceback.format_exc()))
+        finally:
+            _stop_profiler()
+            _profiler = None
+
+
+def _lap(phase: str):
+    """Records the time since the last lap as the duration of `phase`"""
+    global _phase_start
+    now = time.perf_counter()
+    _timings[phase] = _timings.get(phase, 0.0) + now - _phase_start
+    _phase_start = now
+
+
+def _stop_profiler():
+    global _profiler
+    if _profiler is not None:
+        _profiler.disable()
+
+
+def _send_report(connection: Connection):
+    global _profiler
+    stats = None
+    if _profiler is not None:
+        _profiler.create_stats()
+        stats = _profiler.stats  # type: ignore
+        _profiler = None
+    if _report:
+        connection.send(WorkerReport(_timings, stats))
 
 
 TDP = TypeVar("TDP", bound=DesignParameters)
@@ -51,6 +201,15 @@ def user_input(param_cls: type[TDP]) -> TDP:
     """
 
     design_params = param_cls()
+
+    global _current_keys, _current_values
+    _current_values = {
+        k: v
+        for (k, v) in vars(param_cls).items()
+        if not k.startswith("_") and isinstance(v, Value)
+    }
+    _current_keys = {id(v): k for (k, v) in _current_values.items()}
+
     if not _is_dev:
 
         if (
@@ -67,21 +226,366 @@ def user_input(param_cls: type[TDP]) -> TDP:
             if not k.startswith("_") and isinstance(v, Value)
         ]
 
-        _child_connection.send(parameter_ex)
-        res_params: list[ParameterValueResponse] | None = _child_connection.recv()
+        _lap("import")
+        digest = schema_digest(parameter_ex)
+        known = digest in _sent_schemas
+        _child_connection.send(Schema(digest, None if known else parameter_ex))
+        request: EvaluationRequest | list[ParameterValueResponse] | SchemaMiss | None
+        request = _child_connection.recv()
+        if isinstance(request, SchemaMiss):
+            _child_connection.send(Schema(digest, parameter_ex))
+            request = _child_connection.recv()
+        _sent_schemas.add(digest)
+        _lap("user_input")
 
-        if res_params is None:
+        if request is None:
             raise TerminateEvaluationException()
 
+        global _exports, _meshes, _metrics, _stream, _parts, _report, _profiler
+        _report = isinstance(request, EvaluationRequest)
+        _stream = isinstance(request, EvaluationRequest) and request.stream
+        _parts = []
+        if isinstance(request, EvaluationRequest):
+            res_params = [
+                ParameterValueResponse(p.key, value)
+                for p, value in zip(parameter_ex, request.values)
+            ]
+            _exports, _meshes, _metrics = (
+                request.exports,
+                request.meshes,
+                request.metrics,
+            )
+            _profiler = cProfile.Profile() if request.profile else None
+        else:
+            res_params, _exports, _meshes, _metrics = request, [], [], []
+            _profiler = None
+
         apply_response(design_params, res_params)
+        if _profiler is not None:
+            _profiler.enable()
 
     return design_params
 
 
-def finish(obj: Shape | None) -> NoReturn:
+P = ParamSpec("P")
+R = TypeVar("R")
+
+
+def _code_digest(code: CodeType) -> str:
+    """Hashes what a function does, but not where in the file it is defined"""
+    digest = hashlib.sha256(code.co_code)
+    digest.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            digest.update(_code_digest(const).encode())
+        else:
+            digest.update(repr(const).encode())
+    return digest.hexdigest()
+
+
+def _design_roots() -> tuple[str, ...]:
+    """Directories of the loaded designs, which hold their local modules"""
+    return tuple(os.path.join(design.path.parent, "") for design in _designs.values())
+
+
+_PLAIN = (type(None), bool, int, float, complex, str, bytes, Enum)
+
+
+def _hash_value(value: Any, digest: Any, roots: tuple[str, ...], seen: set[int]):
+    """
+    Adds the content of a value a step depends on to `digest`. Code of the design
+    and its local modules is hashed by content, code of libraries by name. Raises
+    TypeError for values that can't be compared by content, like shapes or
+    instances of classes of the design.
+    """
+    if isinstance(value, _PLAIN):
+        digest.update(f"{type(value).__qualname__}:{value!r}".encode())
+    elif isinstance(value, (DesignParameters, Value)):
+        # Reads of parameter values are tracked, see `step`
+        digest.update(type(value).__qualname__.encode())
+    elif id(value) in seen:
+        digest.update(b"<cycle>")
+    elif isinstance(value, (tuple, list, set, frozenset, dict)):
+        seen.add(id(value))
+        items = value.items() if isinstance(value, dict) else value
+        if isinstance(value, (set, frozenset)):
+            items = sorted(value, key=repr)
+        digest.update(f"{type(value).__qualname__}:{len(value)}".encode())
+        for item in items:
+            _hash_value(item, digest, roots, seen)
+    elif isinstance(value, FunctionType) and hasattr(value, "__wrapped__"):
+        # Another step or decorated function, which may have changed as well
+        _hash_value(value.__wrapped__, digest, roots, seen)  # type: ignore
+    elif isinstance(value, FunctionType) and value.__code__.co_filename.startswith(
+        roots
+    ):
+        seen.add(id(value))
+        _hash_function(value, digest, roots, seen)
+    elif isinstance(value, ModuleType) and (
+        getattr(value, "__file__", None) or ""
+    ).startswith(roots):
+        digest.update(file_hash(Path(value.__file__)).encode())  # type: ignore
+    elif isinstance(value, type) and (
+        getattr(sys.modules.get(value.__module__), "__file__", None) or ""
+    ).startswith(roots):
+        raise TypeError(f"Can not hash class {value.__qualname__} of the design")
+    elif isinstance(value, (FunctionType, BuiltinFunctionType, ModuleType, type)):
+        # Libraries only change with their version
+        name = getattr(value, "__qualname__", value.__name__)
+        digest.update(f"{getattr(value, '__module__', '')}.{name}".encode())
+    else:
+        raise TypeError(f"Can not hash {type(value).__qualname__}")
+
+
+def _global_names(code: CodeType) -> set[str]:
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            names |= _global_names(const)
+    return names
+
+
+def _hash_function(
+    fn: FunctionType, digest: Any, roots: tuple[str, ...], seen: set[int]
+):
+    digest.update(_code_digest(fn.__code__).encode())
+    _hash_value(fn.__defaults__, digest, roots, seen)
+    _hash_value(fn.__kwdefaults__, digest, roots, seen)
+    for cell in fn.__closure__ or ():
+        try:
+            _hash_value(cell.cell_contents, digest, roots, seen)
+        except ValueError:
+            # The variable of the enclosing function is not assigned yet
+            digest.update(b"<empty>")
+    for name in sorted(_global_names(fn.__code__)):
+        # Names missing from the globals are builtins or attributes
+        if name in fn.__globals__:
+            digest.update(name.encode())
+            _hash_value(fn.__globals__[name], digest, roots, seen)
+
+
+def _context_digest(fn: FunctionType) -> str:
+    """
+    Hashes what a step depends on besides its arguments and parameter reads: the
+    values of globals it references, its defaults and closure, and the functions
+    it calls. If any of them can't be hashed, the source of the file defining the
+    step is hashed instead, so its results are dropped when the file changes.
+    """
+    digest = hashlib.sha256()
+    try:
+        _hash_function(fn, digest, _design_roots(), {id(fn)})
+    except TypeError:
+        return f"source:{file_hash(Path(fn.__code__.co_filename))}"
+    return digest.hexdigest()
+
+
+class _StepEntry:
+    def __init__(
+        self,
+        args: tuple[Any, ...],
+        context: str,
+        reads: dict[str, Any],
+        result: Any,
+    ):
+        self.args = args
+        self.context = context
+        self.reads = reads
+        self.result = result
+
+    def matches(self, args: tuple[Any, ...], context: str) -> bool:
+        return (
+            self.args == args
+            and self.context == context
+            and all(
+                k in _current_values and _current_values[k].value == v
+                for k, v in self.reads.items()
+            )
+        )
+
+
+_steps: dict[str, list[_StepEntry]] = {}
+_STEP_ENTRIES = 4
+
+
+def _normalize(arg: Any) -> Any:
+    # Reads through parameter instances are tracked, the instance itself is not a key
+    return type(arg).__qualname__ if isinstance(arg, DesignParameters) else arg
+
+
+def step(fn: Callable[P, R]) -> Callable[P, R]:
+    """
+    Memoizes a build step across evaluations of the design in the same worker.
+    Records which parameter values the step reads and returns the previous result
+    while none of them, nor the step's arguments, code, defaults, closure or the
+    globals and functions it references, have changed.
+    """
+    name = f"{fn.__module__}.{fn.__qualname__}"
+    key = f"{name}:{_code_digest(fn.__code__)}"  # type: ignore
+    # Results of an earlier version of the step are never used again
+    for stale in [k for k in _steps if k.rpartition(":")[0] == name and k != key]:
+        del _steps[stale]
+
+    @wraps(fn)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        call = (
+            tuple(_normalize(a) for a in args),
+            tuple(sorted((k, _normalize(v)) for k, v in kwargs.items())),
+        )
+        context = _context_digest(fn)  # type: ignore
+        entries = _steps.setdefault(key, [])
+        for entry in entries:
+            if entry.matches(call, context):
+                return entry.result
+
+        tracker: dict[int, Value[Any]] = {}
+        _read_trackers.append(tracker)
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            _read_trackers.remove(tracker)
+
+        # Values that are not parameters of the current design can't be compared later
+        if all(id(v) in _current_keys for v in tracker.values()):
+            reads = {_current_keys[id(v)]: v.value for v in tracker.values()}
+            entries.insert(0, _StepEntry(call, context, reads, result))
+            del entries[_STEP_ENTRIES:]
+        return result
+
+    return wrapper
+
+
+SESSION_CACHE_BYTES = 256 * 2**20
+"""Default size of all values held by `session_cache` in one worker"""
+
+_session_cache: OrderedDict[tuple[Any, ...], tuple[Any, int]] = OrderedDict()
+_session_cache_bytes: int = 0
+_session_cache_limit: int = SESSION_CACHE_BYTES
+
+
+def _value_size(value: Any) -> int:
+    # Approximates the memory of the value, including OCCT data of shapes
+    try:
+        return len(dumps(value))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+def _evict(limit: int):
+    global _session_cache_bytes
+    while _session_cache_bytes > limit:
+        _, (_, size) = _session_cache.popitem(last=False)
+        _session_cache_bytes -= size
+
+
+def _invalidate(name: str | None):
+    global _session_cache_bytes
+    for key in [k for k in _session_cache if name is None or k[0] == name]:
+        _session_cache_bytes -= _session_cache.pop(key)[1]
+
+
+def invalidate_session_cache():
+    """Drops every value held by `session_cache` in this worker"""
+    _invalidate(None)
+
+
+def set_session_cache_limit(max_bytes: int):
+    """
+    Sets the size all values held by `session_cache` may take in this worker.
+    Least recently used values are dropped first.
+    """
+    global _session_cache_limit
+    _session_cache_limit = max_bytes
+    _evict(max_bytes)
+
+
+def session_cache(fn: Callable[P, R]) -> Callable[P, R]:
+    """
+    Keeps the results of expensive setup, such as looking up fonts or loading
+    reference geometry, for as long as the worker lives. Unlike `step`, results
+    survive edits of the design. They are keyed by the function's arguments and its
+    code, so only editing the function itself discards them. The function must not
+    read parameter values, use `step` for parameter dependent work.
+    `fn.invalidate()` drops the results of the function, for example after a file it
+    reads changed. The size of all results is bounded, see `set_session_cache_limit`.
+    """
+    name = f"{fn.__module__}.{fn.__qualname__}"
+    code = _code_digest(fn.__code__)  # type: ignore
+
+    @wraps(fn)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        global _session_cache_bytes
+        key = (name, code, args, tuple(sorted(kwargs.items())))
+        if (entry := _session_cache.get(key)) is not None:
+            _session_cache.move_to_end(key)
+            return entry[0]
+
+        tracker: dict[int, Value[Any]] = {}
+        _read_trackers.append(tracker)
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            _read_trackers.remove(tracker)
+        if tracker:
+            raise ValueError(
+                f"{fn.__qualname__} reads parameter values and can not be cached for the "
+                + "session. Use `step` instead."
+            )
+
+        # Results of earlier versions of the function are never used again
+        for stale in [k for k in _session_cache if k[0] == name and k[1] != code]:
+            _session_cache_bytes -= _session_cache.pop(stale)[1]
+        if (size := _value_size(result)) <= _session_cache_limit:
+            _evict(_session_cache_limit - size)
+            _session_cache[key] = (result, size)
+            _session_cache_bytes += size
+        return result
+
+    wrapper.invalidate = lambda: _invalidate(name)  # type: ignore
+    return wrapper
+
+
+def emit(name: str, shape: "Shape"):
+    """
+    Provides a named part of the result as soon as it is built. If the driver
+    streams the evaluation, the part is sent right away while the design goes on.
+    Otherwise all parts are combined with the object passed to `finish` into one
+    compound result.
+    """
+    if _is_dev:
+        from cadquery import exporters
+
+        exporters.export(shape, f"{name}.step", exportType="STEP")  # type: ignore
+        return
+
+    if _child_connection is None:
+        raise ValueError("No connection to driver.")
+    if _stream:
+        _lap("build")
+        send(_child_connection, Part(name, shape), _shm_threshold)
+        _lap("send")
+    else:
+        _parts.append(Part(name, shape))
+
+
+def _combine(obj: "Shape | None") -> "Shape | None":
+    """Joins the emitted parts and the object passed to `finish`"""
+    if not _parts:
+        return obj
+    import cadquery as cq
+
+    shapes = [part.shape for part in _parts]
+    return cq.Compound.makeCompound(shapes if obj is None else [*shapes, obj])
+
+
+def finish(obj: "Shape | None") -> NoReturn:
     """
     Marks the end of the evaluation of this design.
-    The provided object is treated as the result.
+    The provided object is treated as the result. If the driver requested exports,
+    they are written here and only their paths and sizes are sent back. If it
+    requested meshes, one is sent per level of detail as soon as it is ready. If it
+    requested metrics, only their values are sent.
+    If it streams the evaluation, the object is sent as the part named "result",
+    unless it is None.
     """
 
     if not _is_dev:
@@ -92,9 +596,49 @@ def finish(obj: Shape | None) -> NoReturn:
         ):
             raise ValueError("No connection to driver.")
 
-        _child_connection.send(obj)
+        if _stream:
+            if obj is not None:
+                emit("result", obj)
+            _stop_profiler()
+            _child_connection.send(EndOfParts())
+            _send_report(_child_connection)
+            raise TerminateEvaluationException()
+
+        _stop_profiler()
+        obj = _combine(obj)
+        _lap("build")
+
+        if (_meshes or _metrics) and obj is None:
+            raise ValueError("Can not mesh or measure a design without result.")
+        if _exports:
+            from .export import export_all
+
+            # A design without result has nothing to export
+            exported = [] if obj is None else export_all(obj, _exports)
+            _lap("export")
+            _child_connection.send(exported)
+        elif _metrics:
+            measured = measure(obj, _metrics)
+            _lap("measure")
+            _child_connection.send(measured)
+        elif _meshes:
+            from .mesh import tessellate
+
+            for tolerance, angular_tolerance in _meshes:
+                mesh = tessellate(obj, tolerance, angular_tolerance)  # type: ignore
+                _lap("tessellate")
+                send(_child_connection, mesh, _shm_threshold)
+                _lap("send")
+        else:
+            data = dumps(obj)
+            _lap("serialize")
+            send_bytes(_child_connection, data, _shm_threshold)
+            _lap("send")
+        _send_report(_child_connection)
         raise TerminateEvaluationException()
     elif obj:
+        from cadquery import exporters
+
         # TODO: figure out what to do if local
         exporters.export(obj, "out.step", exportType="STEP")  # type: ignore
     raise SystemExit()
@@ -1,59 +1,581 @@
+import asyncio
+import hashlib
 import multiprocessing
-from multiprocessing import Pipe, Process
-from multiprocessing.connection import Connection
+import multiprocessing.forkserver
+import os
+import pstats
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from multiprocessing import Pipe, resource_tracker
+from multiprocessing.connection import Client, Connection
+from multiprocessing.context import BaseContext
+from multiprocessing.process import BaseProcess
 from multiprocessing.queues import SimpleQueue
 from pathlib import Path
-from typing import Any
+from queue import Queue
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Callable,
+    Iterator,
+    Sequence,
+    TypedDict,
+    TypeVar,
+    overload,
+)
 
-from cadquery import Shape
+from typing_extensions import NotRequired, Unpack
 
-from .cq_serialize import register
-from .design import _load_design  # type: ignore
-from .interface import ParameterValue, ParameterValueResponse
+from .cache import ResultCache, result_key
+from .design import DesignFailure, _load_design  # type: ignore
+from .interface import (
+    DesignSource,
+    EndOfParts,
+    EvaluationRequest,
+    ExportResult,
+    ExportTarget,
+    ParameterValue,
+    ParameterValueResponse,
+    Part,
+    RunDesign,
+    Schema,
+    SchemaMiss,
+    SourceMiss,
+    WorkerReport,
+    positional_values,
+)
+from .metrics import Metric, check_metrics
+from .node import Address
+from .schema import lookup_schema, remember_schema, resolve_schema
+from .transport import DEFAULT_SHM_THRESHOLD, discard, receive
+from .validate import Validator, schema_validator
 
-register()
+# Results are deserialized on demand, the driver does not import CadQuery itself
+if TYPE_CHECKING:
+    from cadquery import Shape
+
+    from .mesh import Mesh
+
+ZYGOTE_PRELOAD = ["OCP", "cadquery", "cqdf.design", "cqdf.export", "cqdf.mesh"]
+"""Modules imported by the zygote before it forks evaluation processes"""
+
+
+class WorkerError(Exception):
+    """The worker process failed and has been replaced by a fresh one"""
+
+
+class WorkerCrashedError(WorkerError):
+    ...
+
+
+class WorkerTimeoutError(WorkerError):
+    ...
+
+
+class WorkerMemoryError(WorkerError):
+    ...
+
+
+class NodeLostError(WorkerCrashedError):
+    """The connection to a worker node broke or could not be established"""
+
+
+class DesignError(Exception):
+    """The design raised an exception. The worker remains usable."""
+
+
+class SessionOptions(TypedDict):
+    shm_threshold: NotRequired[int | None]
+    timeout: NotRequired[float | None]
+    max_rss: NotRequired[int | None]
+    recycle_rss: NotRequired[int | None]
+    max_evaluations: NotRequired[int | None]
+
+
+def _rss(pid: int) -> int | None:
+    """Resident memory of a process in bytes, if the platform exposes it"""
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
 
 
 class Session:
-    process: Process
+    process: BaseProcess
     connection: Connection
     queue: SimpleQueue[Path]
+    pending: bool = False
+    evaluations: int = 0
+    spawn_time: float | None = None
+    """Seconds it took to start the current worker, until an evaluation claims it"""
+    read_time: float = 0.0
+    """Seconds spent reading and unpickling the last message"""
+    remote: bool = False
+    available: bool = True
+    """Whether the session can take an evaluation right now"""
+    context: BaseContext = multiprocessing.get_context()
 
-    def __init__(self) -> None:
-        ...
+    def __init__(self, **options: Unpack[SessionOptions]) -> None:
+        """
+        - `shm_threshold`: Results of at least this many bytes are transferred through
+          shared memory instead of the pipe. None always uses the pipe.
+        - `timeout`: Seconds an evaluation may take from `start` until its result,
+          or `receive` may wait for a message outside of an evaluation.
+        - `max_rss`: Bytes of resident memory at which a running evaluation is killed.
+        - `recycle_rss`, `max_evaluations`: Replace the worker before the next
+          evaluation once it uses this much memory or has run this many evaluations.
+        """
+        self.shm_threshold = options.get("shm_threshold", DEFAULT_SHM_THRESHOLD)
+        self.timeout = options.get("timeout")
+        self.max_rss = options.get("max_rss")
+        self.recycle_rss = options.get("recycle_rss")
+        self.max_evaluations = options.get("max_evaluations")
 
     def __enter__(self):
+        self._spawn()
+        return self
+
+    def __exit__(self, _exc_type: Any, _exc_value: Any, _exc_traceback: Any):
+        self._close()
+
+    def _spawn(self):
+        started = time.perf_counter()
+        # Shared memory blocks of the worker are tracked by the driver's resource
+        # tracker, so they outlive a stopped worker until `discard` releases them.
+        # Other platforms free a block once no process has it open.
+        if os.name == "posix":
+            resource_tracker.ensure_running()
         self.connection, child_conn = Pipe()
-        self.queue = SimpleQueue(ctx=multiprocessing)
-        self.process = Process(
+        self.queue = SimpleQueue(ctx=self.context)
+        self.process = self.context.Process(
             target=_load_design,
             args=(
                 self.queue,
                 child_conn,
+                self.shm_threshold,
             ),
         )
         self.process.start()
+        child_conn.close()
+        self.evaluations = 0
+        self.pending = False
+        self.spawn_time = time.perf_counter() - started
         if not self.process.pid:
             raise Exception("Unable to start child process.")
-        return self
 
-    def __exit__(self, _exc_type: Any, _exc_value: Any, _exc_traceback: Any):
+    def _close(self):
+        if not hasattr(self, "process"):
+            return
+        self.process.terminate()
+        self.process.join()
+        # Results the worker sent before it was stopped are never received
+        discard(self.connection)
         self.connection.close()
         self.queue.close()
-        self.process.terminate()
+        self.pending = False
+        del self.process
+
+    def _respawn(self):
+        self._close()
+        self._spawn()
 
     def add(self, path: Path):
+        if (
+            self.max_evaluations is not None
+            and self.evaluations >= self.max_evaluations
+        ) or (
+            self.recycle_rss is not None
+            and (rss := _rss(self.process.pid or 0)) is not None
+            and rss >= self.recycle_rss
+        ):
+            self._respawn()
+
         self.queue.put(path)
+        self.evaluations += 1
+        self.pending = True
+
+    def abort(self):
+        """Terminates an evaluation that is still waiting for parameter values"""
+        if self.pending:
+            try:
+                self.connection.send(None)
+            except OSError:
+                self._respawn()
+            self.pending = False
+
+    def send(self, obj: Any):
+        try:
+            self.connection.send(obj)
+        except OSError as e:
+            self._respawn()
+            raise WorkerCrashedError("Worker exited unexpectedly.") from e
+
+    def _deadline(self, timeout: float | None) -> float | None:
+        timeout = self.timeout if timeout is None else timeout
+        return None if timeout is None else time.monotonic() + timeout
+
+    def _read(self) -> Any:
+        """Reads a message that is ready on the pipe"""
+        started = time.perf_counter()
+        try:
+            obj = receive(self.connection)
+            self.read_time = time.perf_counter() - started
+        except (EOFError, OSError) as e:
+            self._respawn()
+            raise WorkerCrashedError("Worker exited unexpectedly.") from e
+        if isinstance(obj, DesignFailure):
+            self.pending = False
+            raise DesignError(obj.message)
+        return obj
+
+    def _check(self, deadline: float | None):
+        """Replaces the worker and raises if it died or exceeded its limits"""
+        error: WorkerError | None = None
+        if not self.process.is_alive():
+            error = WorkerCrashedError(
+                f"Worker exited unexpectedly with code {self.process.exitcode}."
+            )
+        elif deadline is not None and time.monotonic() >= deadline:
+            error = WorkerTimeoutError("Evaluation exceeded its timeout.")
+        elif (
+            self.max_rss is not None
+            and (rss := _rss(self.process.pid or 0)) is not None
+            and rss > self.max_rss
+        ):
+            error = WorkerMemoryError(
+                f"Worker exceeded memory limit ({rss} > {self.max_rss} bytes)."
+            )
+
+        if error is not None:
+            self._respawn()
+            raise error
+
+    def receive(self, timeout: float | None = None) -> Any:
+        """
+        Waits for the next message of the worker, while enforcing the deadline and
+        memory cap. A failed worker is replaced before the error is raised.
+        """
+        deadline = self._deadline(timeout)
+        while True:
+            wait = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+            if self.connection.poll(max(wait, 0)):
+                return self._read()
+            self._check(deadline)
+
+
+class ZygoteSession(Session):
+    """
+    Runs every evaluation in a fresh process, forked from a zygote that has already
+    imported CadQuery and OCP. A failing or stateful design can not affect later
+    evaluations, while starting one costs a fork rather than an import.
+    """
+
+    def __enter__(self):
+        try:
+            self.context = multiprocessing.get_context("forkserver")
+        except ValueError as e:
+            raise RuntimeError(
+                "Isolated evaluations require the forkserver start method, which "
+                + "this platform does not support."
+            ) from e
+        resource_tracker.ensure_running()
+        self.context.set_forkserver_preload(ZYGOTE_PRELOAD)
+        multiprocessing.forkserver.ensure_running()
+        return self
+
+    def _respawn(self):
+        # The next evaluation starts a new process anyway
+        self._close()
+
+    def add(self, path: Path):
+        # Discard the process of the previous evaluation
+        self._close()
+        self._spawn()
+        super().add(path)
+
+
+class RemoteSession(Session):
+    """
+    A worker on a node started with `cqdf_cli node`, reached over TCP or a Unix
+    socket. Designs are sent by content hash, their source only if the node has not
+    cached it yet. The node enforces no memory limits and an evaluation exceeding
+    its timeout is abandoned rather than killed. Exports are written by the driver,
+    see `Evaluation.finish`.
+    """
+
+    connection: Connection | None  # type: ignore
+    remote = True
+    reconnect_interval: float = 10.0
+    """Seconds to wait before connecting to a lost node again"""
+
+    def __init__(
+        self, address: Address, authkey: bytes, **options: Unpack[SessionOptions]
+    ) -> None:
+        super().__init__(**options)
+        self.address = address
+        self.authkey = authkey
+        self.source = b""
+        self.retry_at = 0.0
+
+    @property
+    def available(self) -> bool:  # type: ignore
+        return self.connection is not None or time.monotonic() >= self.retry_at
+
+    def _spawn(self):
+        started = time.perf_counter()
+        self.evaluations = 0
+        self.pending = False
+        try:
+            self.connection = Client(self.address, authkey=self.authkey)
+        except OSError:
+            # Retried by the next evaluation
+            self.connection = None
+            self.retry_at = time.monotonic() + self.reconnect_interval
+            return
+        self.spawn_time = time.perf_counter() - started
+
+    def _close(self):
+        if getattr(self, "connection", None) is not None:
+            self.connection.close()  # type: ignore
+        self.connection = None
+        self.pending = False
+
+    def _lost(self) -> NodeLostError:
+        return NodeLostError(f"Lost connection to worker node {self.address}.")
+
+    def add(self, path: Path):
+        if self.connection is None and time.monotonic() >= self.retry_at:
+            self._spawn()
+        elif (
+            self.max_evaluations is not None
+            and self.evaluations >= self.max_evaluations
+        ):
+            self._respawn()
+        if self.connection is None:
+            raise NodeLostError(f"Worker node {self.address} is unreachable.")
+
+        self.source = path.read_bytes()
+        digest = hashlib.sha256(self.source).hexdigest()
+        try:
+            self.connection.send(RunDesign(path.name, digest))
+        except OSError as e:
+            self._respawn()
+            raise self._lost() from e
+        self.evaluations += 1
+        self.pending = True
+
+    def abort(self):
+        if self.connection is None:
+            self.pending = False
+        super().abort()
+
+    def send(self, obj: Any):
+        if self.connection is None:
+            raise self._lost()
+        try:
+            self.connection.send(obj)
+        except OSError as e:
+            self._respawn()
+            raise self._lost() from e
+
+    def _read(self) -> Any:
+        try:
+            return super()._read()
+        except WorkerCrashedError as e:
+            # Already reconnected
+            raise self._lost() from e.__cause__
+
+    def _check(self, deadline: float | None):
+        if deadline is not None and time.monotonic() >= deadline:
+            # The node's worker exits once the design notices the closed connection
+            self._respawn()
+            raise WorkerTimeoutError("Evaluation exceeded its timeout.")
+
+    def receive(self, timeout: float | None = None) -> Any:
+        while isinstance(obj := super().receive(timeout), SourceMiss):
+            self.send(DesignSource(obj.digest, self.source))
+        return obj
+
+
+T = TypeVar("T")
+
+
+class SessionPool:
+    """
+    A fixed number of warm sessions. Each worker imports CadQuery once when the
+    pool is entered, evaluations are then handed to whichever session is idle.
+    """
+
+    sessions: list[Session]
+    idle: Queue[Session]
+    parked: list[Session]
+    """Sessions of lost worker nodes, waiting to reconnect"""
+
+    def __init__(
+        self,
+        size: int | None = None,
+        isolated: bool = False,
+        nodes: Sequence[tuple[Address, int]] = (),
+        authkey: bytes | None = None,
+        retries: int = 2,
+        **options: Unpack[SessionOptions],
+    ) -> None:
+        """
+        With `isolated`, every evaluation runs in its own process forked from a
+        zygote, see `ZygoteSession`. `options` are passed to every session.
+        - `nodes`: (address, workers) of worker nodes. The pool opens that many
+          `RemoteSession`s to each node, next to its `size` local sessions.
+        - `authkey`: Key shared with the worker nodes.
+        - `retries`: Times `run` repeats an evaluation whose worker node was lost.
+        """
+        self.local_size = (os.cpu_count() or 1) if size is None else size
+        self.nodes = list(nodes)
+        self.size = self.local_size + sum(workers for _, workers in self.nodes)
+        self.authkey = authkey
+        self.retries = retries
+        self.lock = threading.Lock()
+        self.options = options
+        self.session_type = ZygoteSession if isolated else Session
+        if self.local_size < 0 or self.size < 1:
+            raise ValueError("Pool size has to be at least 1.")
+        if self.nodes and authkey is None:
+            raise ValueError("Worker nodes require an authkey.")
+
+    def __enter__(self):
+        self.sessions = []
+        self.idle = Queue()
+        self.parked = []
+        try:
+            for _ in range(self.local_size):
+                session = self.session_type(**self.options).__enter__()
+                self.sessions.append(session)
+                self.idle.put(session)
+            for address, workers in self.nodes:
+                for _ in range(workers):
+                    session = RemoteSession(
+                        address, self.authkey, **self.options  # type: ignore
+                    ).__enter__()
+                    self.sessions.append(session)
+                    self._release(session)
+        except:
+            self.__exit__(None, None, None)
+            raise
+        return self
+
+    def __exit__(self, _exc_type: Any, _exc_value: Any, _exc_traceback: Any):
+        for session in self.sessions:
+            session.__exit__(None, None, None)
+        self.sessions = []
+
+    def _release(self, session: Session):
+        """
+        Makes a session idle again. Sessions of lost worker nodes are parked until
+        they may reconnect, unless no other session is left.
+        """
+        with self.lock:
+            for parked in [s for s in self.parked if s.available]:
+                self.parked.remove(parked)
+                self.idle.put(parked)
+            if session.available or len(self.parked) + 1 >= len(self.sessions):
+                self.idle.put(session)
+            else:
+                self.parked.append(session)
+
+    @contextmanager
+    def acquire(self, timeout: float | None = None) -> Iterator[Session]:
+        """
+        Blocks until a session is idle and reserves it for the duration of the `with` block.
+        Evaluations left unfinished are terminated when the session is released.
+        """
+        session = self.idle.get(timeout=timeout)
+        try:
+            yield session
+        finally:
+            if session.pending:
+                session.abort()
+            self._release(session)
+
+    def run(self, evaluate: Callable[[Session], T], timeout: float | None = None) -> T:
+        """
+        Calls `evaluate` with an idle session, see `acquire`. If the worker node of
+        the session is lost, the call is repeated with another session.
+        """
+        retries = self.retries
+        while True:
+            with self.acquire(timeout) as session:
+                try:
+                    return evaluate(session)
+                except NodeLostError:
+                    if retries == 0:
+                        raise
+                    retries -= 1
+
+
+def _remaining(deadline: float | None) -> float | None:
+    """Seconds left until the deadline of an evaluation, for `Session.receive`"""
+    return None if deadline is None else max(deadline - time.monotonic(), 0.0)
+
+
+def _begin_finish(
+    evaluation: "Evaluation | AsyncEvaluation",
+    session: Session,
+    res_params: list[ParameterValueResponse],
+    metrics: list[Metric] | None = None,
+) -> list[ParameterValueResponse]:
+    """
+    Checks that an evaluation waits for its values and validates them, along with
+    the metrics to measure. Invalid values end the evaluation, so the session can
+    start the next one.
+    """
+    if evaluation.completed:
+        raise ValueError(
+            "Can not finish script that has already finished. Have you called `finish` before?"
+        )
+    if not evaluation.parameters:
+        raise ValueError(
+            "Can not finish script that has not provided parameters yet. Have you forgotten to call `user_input`?"
+        )
+    try:
+        check_metrics(metrics or [])
+        return evaluation.validator.validate(res_params)  # type: ignore
+    except (LookupError, TypeError, ValueError):
+        session.abort()
+        evaluation.completed = True
+        raise
 
 
 class Evaluation:
     completed = False
+    deadline: float | None = None
+    """Monotonic time by which the evaluation has to be done, set by `start`"""
     parameters: list[ParameterValue] | None = None
-    result: Shape | None = None
+    result: "Shape | None" = None
+    exported: list[ExportResult] | None = None
+    validator: Validator | None = None
+    stats: pstats.Stats | None = None
 
-    def __init__(self, path: Path, session: Session) -> None:
+    def __init__(
+        self,
+        path: Path,
+        session: Session,
+        cache: ResultCache | None = None,
+        timeout: float | None = None,
+        profile: bool = False,
+    ) -> None:
+        """
+        `timeout` overrides the session's timeout for the whole evaluation.
+        The duration of each phase is recorded in `timings`. With `profile`, the
+        design script is run under cProfile and its statistics end up in `stats`.
+        """
         self.path = path
         self.session = session
+        self.cache = cache
+        self.timeout = timeout
+        self.profile = profile
+        self.timings: dict[str, float] = {}
 
     def start(self) -> list[ParameterValue]:
         """Run until script provides us with DesignParameters. Call `finish` afterwards to complete evaluation"""
@@ -61,33 +583,402 @@ class Evaluation:
             raise ValueError(
                 "Can not start script that has already started. Have you called `start` before?"
             )
+        started = time.perf_counter()
         self.session.add(self.path)
-        self.parameters = self.session.connection.recv()
-        return self.parameters
+        self.deadline = self.session._deadline(self.timeout)
+        schema: Schema = self.session.receive(_remaining(self.deadline))
+        if (params := resolve_schema(schema)) is None:
+            self.session.send(SchemaMiss(schema.digest))
+            params = resolve_schema(self.session.receive(_remaining(self.deadline)))
+        self.parameters = params
+        self.timings["start"] = time.perf_counter() - started
+        if self.session.spawn_time is not None:
+            self.timings["spawn"] = self.session.spawn_time
+            self.session.spawn_time = None
+        remember_schema(self.path, self.parameters)  # type: ignore
+        self.validator = schema_validator(schema.digest, self.parameters)  # type: ignore
+        return self.parameters  # type: ignore
 
     def start_params(self) -> list[ParameterValue]:
-        """Run until script provides us with DesignParameters, then terminate evaluation"""
+        """
+        Returns the DesignParameters of the script. Reads them from the source or the
+        schema cache if possible, otherwise runs until the script provides them and
+        terminates the evaluation.
+        """
+        if (params := lookup_schema(self.path)) is not None:
+            self.completed = True
+            return params
+
         params = self.start()
-        self.session.connection.send(None)
+        self.session.abort()
         self.completed = True
         return params
 
-    def finish(self, res_params: list[ParameterValueResponse]):
-        """Complete script with the provided ParameterValueResponse"""
-        if self.completed:
-            raise ValueError(
-                "Can not finish script that has already finished. Have you called `finish` before?"
+    @overload
+    def finish(self, res_params: list[ParameterValueResponse]) -> "Shape | None":
+        ...
+
+    @overload
+    def finish(
+        self, res_params: list[ParameterValueResponse], exports: list[ExportTarget]
+    ) -> list[ExportResult]:
+        ...
+
+    def finish(
+        self,
+        res_params: list[ParameterValueResponse],
+        exports: list[ExportTarget] | None = None,
+    ):
+        """
+        Complete script with the provided ParameterValueResponse.
+        With `exports`, the worker writes the result to those files itself and only
+        their paths and sizes are returned.
+        """
+        # Invalid values are rejected here instead of after a round trip
+        res_params = _begin_finish(self, self.session, res_params)
+        if exports and self.session.remote:
+            # A worker node would write the files to its own disk
+            from .export import export_all
+
+            self.result = self._evaluate(res_params)
+            self.completed = True
+            started = time.perf_counter()
+            # A design without result has nothing to export
+            self.exported = (
+                [] if self.result is None else export_all(self.result, exports)
             )
-        if not self.parameters:
-            raise ValueError(
-                "Can not finish script that has not provided parameters yet. Have you forgotten to call `user_input`?"
+            self.timings["export"] = time.perf_counter() - started
+            return self.exported
+        if exports:
+            started = time.perf_counter()
+            self.session.send(self._request(res_params, exports=exports))
+            self.exported = self.session.receive(_remaining(self.deadline))
+            self._receive_report()
+            self.timings["finish"] = time.perf_counter() - started
+            self.session.pending = False
+            self.completed = True
+            return self.exported
+
+        if self.cache is None:
+            self.result = self._evaluate(res_params)
+        else:
+            key = result_key(self.path, self.parameters, res_params)
+            self.result = self.cache.get_or_evaluate(
+                key, lambda: self._evaluate(res_params)
             )
+            # Cache hit, the script is still waiting for its parameters
+            self.session.abort()
+        self.completed = True
+        return self.result
+
+    def meshes(
+        self,
+        res_params: list[ParameterValueResponse],
+        tolerances: list[tuple[float, float]],
+    ) -> "Iterator[Mesh]":
+        """
+        Complete script with the provided ParameterValueResponse and yield its result
+        tessellated in the worker, one `Mesh` per (linear, angular) tolerance in the
+        given order, as soon as each is ready. Pass coarse tolerances first.
+        """
+        res_params = _begin_finish(self, self.session, res_params)
+        started = time.perf_counter()
+        self.session.send(self._request(res_params, meshes=tolerances))
+        remaining = len(tolerances)
+        try:
+            while remaining:
+                mesh = self.session.receive(_remaining(self.deadline))
+                remaining -= 1
+                if not remaining:
+                    self._receive_report()
+                    self.timings["finish"] = time.perf_counter() - started
+                yield mesh
+        except GeneratorExit:
+            if remaining:
+                # Stopped early, the worker is still sending the remaining meshes
+                self.session._respawn()  # type: ignore
+            raise
+        finally:
+            self.session.pending = False
+            self.completed = True
+
+    def measure(
+        self, res_params: list[ParameterValueResponse], metrics: list[Metric]
+    ) -> dict[str, float]:
+        """
+        Complete script with the provided ParameterValueResponse and return the given
+        metrics of its result, keyed by name. They are computed in the worker, the
+        shape is not transferred.
+        """
+        res_params = _begin_finish(self, self.session, res_params, metrics)
+        started = time.perf_counter()
+        self.session.send(self._request(res_params, metrics=metrics))
+        measured: dict[str, float] = self.session.receive(_remaining(self.deadline))
+        self._receive_report()
+        self.timings["finish"] = time.perf_counter() - started
+        self.session.pending = False
+        self.completed = True
+        return measured
+
+    def parts(self, res_params: list[ParameterValueResponse]) -> Iterator[Part]:
+        """
+        Complete script with the provided ParameterValueResponse and yield every part
+        the design emits as soon as it arrives, so that handling early parts overlaps
+        with building later ones. The object passed to `finish` comes last, as the
+        part named "result".
+        """
+        res_params = _begin_finish(self, self.session, res_params)
+        started = time.perf_counter()
+        self.session.send(self._request(res_params, stream=True))
+        done = False
+        try:
+            while not isinstance(
+                part := self.session.receive(_remaining(self.deadline)), EndOfParts
+            ):
+                yield part
+            done = True
+            self._receive_report()
+            self.timings["finish"] = time.perf_counter() - started
+        except GeneratorExit:
+            if not done:
+                # Stopped early, the worker is still building and sending parts
+                self.session._respawn()  # type: ignore
+            raise
+        finally:
+            self.session.pending = False
+            self.completed = True
+
+    def _request(
+        self, res_params: list[ParameterValueResponse], **kwargs: Any
+    ) -> EvaluationRequest:
+        values = positional_values(self.parameters, res_params)  # type: ignore
+        return EvaluationRequest(values, profile=self.profile, **kwargs)
+
+    def _receive_report(self):
+        report: WorkerReport = self.session.receive(_remaining(self.deadline))
+        self.timings.update(report.timings)
+        if report.stats is not None:
+            self.stats = pstats.Stats(_ProfileStats(report.stats))
+
+    def _evaluate(self, res_params: list[ParameterValueResponse]) -> "Shape | None":
+        # send response and await completion
+        started = time.perf_counter()
+        self.session.send(self._request(res_params))
+        result: "Shape | None" = self.session.receive(_remaining(self.deadline))
+        self.timings["receive"] = self.session.read_time
+        self._receive_report()
+        self.timings["finish"] = time.perf_counter() - started
+        self.session.pending = False
+        return result
+
+
+class _ProfileStats:
+    """Lets `pstats.Stats` load statistics received from the worker"""
+
+    def __init__(self, stats: dict[Any, Any]) -> None:
+        self.stats = stats
+
+    def create_stats(self):
+        ...
+
+
+class AsyncSession:
+    """
+    A session whose worker messages are awaited on the event loop, which watches the
+    pipe instead of blocking a thread. Takes the same options as `Session`.
+    """
+
+    def __init__(
+        self, isolated: bool = False, **options: Unpack[SessionOptions]
+    ) -> None:
+        self.session = (ZygoteSession if isolated else Session)(**options)
+
+    async def __aenter__(self):
+        self.session.__enter__()
+        return self
+
+    async def __aexit__(self, _exc_type: Any, _exc_value: Any, _exc_traceback: Any):
+        self.session.__exit__(None, None, None)
+
+    @property
+    def pending(self):
+        return self.session.pending
+
+    async def _readable(self, wait: float) -> bool:
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+        fd = self.session.connection.fileno()
+        loop.add_reader(fd, lambda: ready.done() or ready.set_result(True))
         try:
-            # send response and await completion
-            self.session.connection.send(res_params)
-            self.result: Shape | None = self.session.connection.recv()
-        except Exception as e:
-            raise e
+            return await asyncio.wait_for(ready, wait)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            loop.remove_reader(fd)
+
+    async def receive(self, timeout: float | None = None) -> Any:
+        """
+        Awaits the next message of the worker, see `Session.receive`.
+        If cancelled while the worker is busy, the worker is replaced.
+        """
+        session = self.session
+        deadline = session._deadline(timeout)  # type: ignore
+        try:
+            while True:
+                wait = (
+                    0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+                )
+                if await self._readable(max(wait, 0)):
+                    return session._read()  # type: ignore
+                session._check(deadline)  # type: ignore
+        except asyncio.CancelledError:
+            session._respawn()  # type: ignore
+            raise
+
+
+class AsyncSessionPool:
+    """
+    A fixed number of warm sessions shared by the coroutines of one event loop,
+    see `SessionPool`.
+    """
+
+    sessions: list[AsyncSession]
+    idle: asyncio.Queue[AsyncSession]
+
+    def __init__(
+        self,
+        size: int | None = None,
+        isolated: bool = False,
+        **options: Unpack[SessionOptions],
+    ) -> None:
+        self.size = size or os.cpu_count() or 1
+        self.isolated = isolated
+        self.options = options
+        if self.size < 1:
+            raise ValueError("Pool size has to be at least 1.")
+
+    async def __aenter__(self):
+        self.sessions = []
+        self.idle = asyncio.Queue()
+        try:
+            for _ in range(self.size):
+                session = AsyncSession(self.isolated, **self.options)
+                await session.__aenter__()
+                self.sessions.append(session)
+                self.idle.put_nowait(session)
+        except:
+            await self.__aexit__(None, None, None)
+            raise
+        return self
+
+    async def __aexit__(self, _exc_type: Any, _exc_value: Any, _exc_traceback: Any):
+        for session in self.sessions:
+            await session.__aexit__(None, None, None)
+        self.sessions = []
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[AsyncSession]:
+        """
+        Waits until a session is idle and reserves it for the duration of the
+        `async with` block. Evaluations left unfinished are terminated on release.
+        """
+        session = await self.idle.get()
+        try:
+            yield session
+        finally:
+            if session.pending:
+                session.session.abort()
+            self.idle.put_nowait(session)
+
+
+class AsyncEvaluation:
+    """Awaitable counterpart of `Evaluation`"""
+
+    completed = False
+    deadline: float | None = None
+    parameters: list[ParameterValue] | None = None
+    result: "Shape | None" = None
+    exported: list[ExportResult] | None = None
+    validator: Validator | None = None
+
+    def __init__(
+        self, path: Path, session: AsyncSession, timeout: float | None = None
+    ) -> None:
+        self.path = path
+        self.session = session
+        self.timeout = timeout
+        self.timings: dict[str, float] = {}
+
+    async def start(self) -> list[ParameterValue]:
+        """Run until script provides us with DesignParameters. Call `finish` afterwards to complete evaluation"""
+        if self.parameters is not None or self.completed:
+            raise ValueError(
+                "Can not start script that has already started. Have you called `start` before?"
+            )
+        self.session.session.add(self.path)
+        self.deadline = self.session.session._deadline(self.timeout)
+        schema: Schema = await self.session.receive(_remaining(self.deadline))
+        if (params := resolve_schema(schema)) is None:
+            self.session.session.send(SchemaMiss(schema.digest))
+            params = resolve_schema(
+                await self.session.receive(_remaining(self.deadline))
+            )
+        self.parameters = params
+        remember_schema(self.path, self.parameters)  # type: ignore
+        self.validator = schema_validator(schema.digest, self.parameters)  # type: ignore
+        return self.parameters  # type: ignore
+
+    async def start_params(self) -> list[ParameterValue]:
+        """Returns the DesignParameters of the script, see `Evaluation.start_params`"""
+        if (params := lookup_schema(self.path)) is not None:
+            self.completed = True
+            return params
+
+        params = await self.start()
+        self.session.session.abort()
+        self.completed = True
+        return params
+
+    async def finish(
+        self,
+        res_params: list[ParameterValueResponse],
+        exports: list[ExportTarget] | None = None,
+    ):
+        """Complete script with the provided ParameterValueResponse, see `Evaluation.finish`"""
+        res_params = _begin_finish(self, self.session.session, res_params)
+        values = positional_values(self.parameters, res_params)
+        self.session.session.send(EvaluationRequest(values, exports or []))
+        if exports:
+            self.exported = await self.session.receive(_remaining(self.deadline))
         else:
+            self.result = await self.session.receive(_remaining(self.deadline))
+        report: WorkerReport = await self.session.receive(_remaining(self.deadline))
+        self.timings.update(report.timings)
+        self.session.session.pending = False
+        self.completed = True
+        return self.exported if exports else self.result
+
+    async def parts(
+        self, res_params: list[ParameterValueResponse]
+    ) -> AsyncIterator[Part]:
+        """Yields the parts the design emits as they arrive, see `Evaluation.parts`"""
+        res_params = _begin_finish(self, self.session.session, res_params)
+        values = positional_values(self.parameters, res_params)
+        self.session.session.send(EvaluationRequest(values, stream=True))
+        done = False
+        try:
+            while not isinstance(
+                part := await self.session.receive(_remaining(self.deadline)),
+                EndOfParts,
+            ):
+                yield part
+            done = True
+            report: WorkerReport = await self.session.receive(_remaining(self.deadline))
+            self.timings.update(report.timings)
+        except GeneratorExit:
+            if not done:
+                self.session.session._respawn()  # type: ignore
+            raise
+        finally:
+            self.session.session.pending = False
             self.completed = True
-            return self.result
@@ -0,0 +1,81 @@
+import os
+import traceback
+
+import cadquery as cq
+from cadquery import exporters
+
+from .interface import ExportResult, ExportTarget
+
+_ASSEMBLY_TYPES = {"GLTF", "GLB", "XML", "VTKJS"}
+_ALIASES = {"STP": "STEP"}
+
+
+class ExportError(Exception):
+    ...
+
+
+def _export_type(target: ExportTarget) -> str:
+    export_type = (target.export_type or target.path.suffix.removeprefix(".")).upper()
+    return _ALIASES.get(export_type, export_type)
+
+
+def export(shape: cq.Shape | cq.Assembly, target: ExportTarget) -> ExportResult:
+    """Writes a single export target"""
+    export_type = _export_type(target)
+    target.path.parent.mkdir(parents=True, exist_ok=True)
+    if export_type in _ASSEMBLY_TYPES or isinstance(shape, cq.Assembly):
+        # Formats only supported for assemblies, or an assembly as result
+        assembly = shape if isinstance(shape, cq.Assembly) else cq.Assembly(shape)
+        assembly.save(
+            str(target.path),
+            export_type,  # type: ignore
+            tolerance=target.tolerance,
+            angularTolerance=target.angular_tolerance,
+        )
+    else:
+        exporters.export(
+            shape,
+            str(target.path),
+            export_type,  # type: ignore
+            tolerance=target.tolerance,
+            angularTolerance=target.angular_tolerance,
+        )
+    return ExportResult(target.path, target.path.stat().st_size)
+
+
+def export_all(shape: cq.Shape, targets: list[ExportTarget]) -> list[ExportResult]:
+    """
+    Writes all export targets. OCCT's writers are not thread-safe, so with more
+    than one target each is written in a forked process, in parallel.
+    """
+    if len(targets) < 2 or not hasattr(os, "fork"):
+        return [export(shape, target) for target in targets]
+
+    children: list[tuple[int, int, ExportTarget]] = []
+    for target in targets:
+        read, write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read)
+            code = 0
+            try:
+                export(shape, target)
+            except BaseException:
+                os.write(write, traceback.format_exc().encode()[-4096:])
+                code = 1
+            finally:
+                os._exit(code)  # type: ignore
+        os.close(write)
+        children.append((pid, read, target))
+
+    errors: list[str] = []
+    for pid, read, target in children:
+        with os.fdopen(read, "rb") as f:
+            message = f.read().decode(errors="replace")
+        _, status = os.waitpid(pid, 0)
+        if os.waitstatus_to_exitcode(status) != 0:
+            errors.append(f"{target.path}: {message or 'export process failed'}")
+    if errors:
+        raise ExportError("\n".join(errors))
+
+    return [ExportResult(t.path, t.path.stat().st_size) for _, _, t in children]
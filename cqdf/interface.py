@@ -1,6 +1,8 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from pathlib import Path
 from typing import Any, Sequence
 
+from .metrics import Metric
 from .parameter import DesignParameters, PType, Value, VType
 from .util import natural_str
 
@@ -18,6 +20,107 @@ class ParameterValueResponse:
     value: Any
 
 
+@dataclass
+class ExportTarget:
+    """
+    A file the worker writes the result to. The format is derived from the suffix
+    unless `export_type` is given. Tolerances apply to tessellated formats.
+    """
+
+    path: Path
+    export_type: str | None = None
+    tolerance: float = 0.1
+    angular_tolerance: float = 0.1
+
+
+@dataclass
+class ExportResult:
+    path: Path
+    size: int
+
+
+@dataclass
+class Schema:
+    """
+    Parameters of a design as announced by the worker. The parameters are left out
+    if this worker already sent the schema with the same `digest` before.
+    """
+
+    digest: str
+    parameters: list[ParameterValue] | None = None
+
+
+@dataclass
+class SchemaMiss:
+    """Asks the worker for the parameters of a schema the driver does not know"""
+
+    digest: str
+
+
+@dataclass
+class EvaluationRequest:
+    """
+    Parameter values for the design, along with the exports to perform or the
+    (linear, angular) tolerances to tessellate the result with
+    """
+
+    values: list[Any]
+    """The value of every parameter, in the order of the schema"""
+    exports: list[ExportTarget] = field(default_factory=list)
+    meshes: list[tuple[float, float]] = field(default_factory=list)
+    metrics: list[Metric] = field(default_factory=list)
+    """Measure the result in the worker and only send the values, see `metrics`"""
+    profile: bool = False
+    stream: bool = False
+    """Send every emitted part as soon as it is built, see `design.emit`"""
+
+
+@dataclass
+class Part:
+    """A named part of a design's result"""
+
+    name: str
+    shape: Any
+
+
+@dataclass
+class EndOfParts:
+    """Sent after the last part of a streamed evaluation"""
+
+
+@dataclass
+class WorkerReport:
+    """
+    Sent by the worker after the result of an `EvaluationRequest`. Contains the
+    duration in seconds of each phase in the worker and, if requested, the raw
+    cProfile statistics of the design script.
+    """
+
+    timings: dict[str, float]
+    stats: dict[Any, Any] | None = None
+
+
+@dataclass
+class RunDesign:
+    """Asks a worker node to run a design, identified by its content hash"""
+
+    name: str
+    digest: str
+
+
+@dataclass
+class SourceMiss:
+    """Asks the driver for the source of a design the worker node has not cached"""
+
+    digest: str
+
+
+@dataclass
+class DesignSource:
+    digest: str
+    source: bytes
+
+
 def make_parameter(key: str, value: Value[Any]):
     """
     Constructs a DTO from the given value
@@ -61,3 +164,14 @@ def apply_response(
                 f"Received invalid value for parameter {res_param.key}"
             ) from e
     return params
+
+
+def positional_values(
+    params: Sequence[ParameterValue], res_params: Sequence[ParameterValueResponse]
+) -> list[Any]:
+    """
+    Orders the response values like the parameters of the schema. Parameters without
+    a response keep their default.
+    """
+    values = {res_param.key: res_param.value for res_param in res_params}
+    return [values.get(p.key, p.value.value) for p in params]
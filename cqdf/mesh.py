@@ -0,0 +1,112 @@
+from dataclasses import dataclass
+from typing import Any
+
+import cadquery as cq
+import numpy as np
+import numpy.typing as npt
+from OCP.BRep import BRep_Tool
+from OCP.BRepLib import BRepLib_ToolTriangulatedShape
+from OCP.BRepMesh import BRepMesh_IncrementalMesh
+from OCP.TopAbs import TopAbs_REVERSED
+from OCP.TopLoc import TopLoc_Location
+
+
+@dataclass
+class Mesh:
+    """
+    Triangles of a shape at one level of detail. Vertices are not shared between
+    faces, so every face keeps its own normals.
+    """
+
+    tolerance: float
+    angular_tolerance: float
+    vertices: npt.NDArray[np.float32]
+    """(N, 3) vertex positions"""
+    normals: npt.NDArray[np.float32]
+    """(N, 3) vertex normals"""
+    triangles: npt.NDArray[np.uint32]
+    """(M, 3) vertex indices, counter-clockwise seen from outside"""
+    face_ids: npt.NDArray[np.uint32]
+    """(M,) index of the face in `shape.Faces()` each triangle belongs to"""
+    solid_ids: npt.NDArray[np.int32]
+    """(M,) index of the solid in `shape.Solids()`, -1 for faces outside a solid"""
+
+
+def _join(parts: list[npt.NDArray[Any]], empty: tuple[int, ...], dtype: Any):
+    if not parts:
+        return np.empty(empty, dtype)
+    return np.ascontiguousarray(np.concatenate(parts), dtype)
+
+
+def _transformation(
+    location: TopLoc_Location,
+) -> tuple[npt.NDArray[np.float64], npt.NDArray[np.float64]]:
+    """
+    Returns the (3, 4) affine matrix of the location and the (3, 3) matrix that
+    transforms directions like `gp_Dir.Transformed`, without the scale
+    """
+    transform = location.Transformation()
+    matrix = np.array(
+        [[transform.Value(row, col) for col in range(1, 5)] for row in range(1, 4)]
+    )
+    return matrix, matrix[:, :3] / abs(transform.ScaleFactor())
+
+
+def tessellate(shape: cq.Shape, tolerance: float, angular_tolerance: float) -> Mesh:
+    """Meshes the shape and collects the triangulation of every face"""
+    BRepMesh_IncrementalMesh(shape.wrapped, tolerance, False, angular_tolerance, True)
+
+    solid_of = {
+        face: i for i, solid in enumerate(shape.Solids()) for face in solid.Faces()
+    }
+
+    vertices: list[npt.NDArray[np.float32]] = []
+    normals: list[npt.NDArray[np.float32]] = []
+    triangles: list[npt.NDArray[np.uint32]] = []
+    face_ids: list[npt.NDArray[np.uint32]] = []
+    solid_ids: list[npt.NDArray[np.int32]] = []
+    offset = 0
+
+    for face_id, face in enumerate(shape.Faces()):
+        location = TopLoc_Location()
+        poly = BRep_Tool.Triangulation_s(face.wrapped, location)
+        if poly is None:
+            continue
+        if not poly.HasNormals():
+            BRepLib_ToolTriangulatedShape.ComputeNormals_s(face.wrapped, poly)
+
+        matrix, rotation = _transformation(location)
+        reversed_ = face.wrapped.Orientation() == TopAbs_REVERSED
+
+        nodes = range(1, poly.NbNodes() + 1)
+        face_vertices = np.array([poly.Node(i).Coord() for i in nodes]).reshape(-1, 3)
+        face_normals = np.array([poly.Normal(i).Coord() for i in nodes]).reshape(-1, 3)
+        face_vertices = face_vertices @ matrix[:, :3].T + matrix[:, 3]
+        face_normals = face_normals @ rotation.T
+        if reversed_:
+            face_normals = -face_normals
+
+        face_triangles = np.array(
+            [poly.Triangle(i).Get() for i in range(1, poly.NbTriangles() + 1)],
+            np.uint32,
+        ).reshape(-1, 3)
+        face_triangles -= 1
+        if reversed_:
+            face_triangles = face_triangles[:, ::-1]
+
+        vertices.append(face_vertices)
+        normals.append(face_normals)
+        triangles.append(face_triangles + offset)
+        face_ids.append(np.full(len(face_triangles), face_id, np.uint32))
+        solid_ids.append(np.full(len(face_triangles), solid_of.get(face, -1), np.int32))
+        offset += len(face_vertices)
+
+    return Mesh(
+        tolerance,
+        angular_tolerance,
+        _join(vertices, (0, 3), np.float32),
+        _join(normals, (0, 3), np.float32),
+        _join(triangles, (0, 3), np.uint32),
+        _join(face_ids, (0,), np.uint32),
+        _join(solid_ids, (0,), np.int32),
+    )
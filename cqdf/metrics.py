@@ -0,0 +1,37 @@
+from typing import Any, Callable
+
+Metric = str | Callable[[Any], float]
+"""Name of a built-in metric or a function of the result, run in the worker"""
+
+METRICS: dict[str, Callable[[Any], float]] = {
+    "volume": lambda shape: shape.Volume(),
+    "area": lambda shape: shape.Area(),
+    "xlen": lambda shape: shape.BoundingBox().xlen,
+    "ylen": lambda shape: shape.BoundingBox().ylen,
+    "zlen": lambda shape: shape.BoundingBox().zlen,
+}
+
+
+def metric_name(metric: Metric) -> str:
+    return metric if isinstance(metric, str) else metric.__name__
+
+
+def check_metrics(metrics: list[Metric]):
+    """Raises before evaluating if a metric is unknown"""
+    for metric in metrics:
+        if isinstance(metric, str) and metric not in METRICS:
+            raise LookupError(
+                f"Unknown metric {metric}. Use one of {', '.join(METRICS)} or a function"
+            )
+
+
+def measure(shape: Any, metrics: list[Metric]) -> dict[str, float]:
+    """Computes the metrics of a result. Assemblies are measured as one compound."""
+    if hasattr(shape, "toCompound"):
+        shape = shape.toCompound()
+    return {
+        metric_name(metric): float(
+            METRICS[metric](shape) if isinstance(metric, str) else metric(shape)
+        )
+        for metric in metrics
+    }
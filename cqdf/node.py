@@ -0,0 +1,122 @@
+import hashlib
+import importlib
+import multiprocessing
+import os
+import re
+import tempfile
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Connection, Listener
+from pathlib import Path
+
+from .design import _load_design  # type: ignore
+from .interface import DesignSource, RunDesign, SourceMiss
+
+_DIGEST = re.compile("[0-9a-f]{64}")
+
+Address = str | tuple[str, int]
+"""(host, port) of a TCP socket or the path of a Unix socket"""
+
+
+def parse_address(spec: str) -> Address:
+    """Parses `host:port` or `:port` as TCP address, anything else as socket path"""
+    host, sep, port = spec.rpartition(":")
+    if sep and port.isdigit():
+        return (host or "127.0.0.1", int(port))
+    return spec
+
+
+class _SourceQueue:
+    """
+    Takes the place of the path queue of `_load_design` on a worker node. Receives
+    the next design from the driver and returns the path of its cached source,
+    asking the driver for the source first if it is not cached yet.
+    """
+
+    def __init__(self, connection: Connection, cache: Path) -> None:
+        self.connection = connection
+        self.cache = cache
+
+    def get(self) -> Path:
+        request = self.connection.recv()
+        if not isinstance(request, RunDesign):
+            raise ValueError(f"Expected a design, received {type(request).__name__}")
+        # Both become part of the path in the cache
+        if not _DIGEST.fullmatch(request.digest):
+            raise ValueError(f"Invalid digest {request.digest!r}")
+        if Path(request.name).name != request.name or request.name in ("", ".", ".."):
+            raise ValueError(f"Invalid design name {request.name!r}")
+
+        path = self.cache / request.digest / request.name
+        if not path.exists():
+            self.connection.send(SourceMiss(request.digest))
+            source = self.connection.recv()
+            # The cache is shared by all drivers, it only holds what the digest says
+            if (
+                not isinstance(source, DesignSource)
+                or hashlib.sha256(source.source).hexdigest() != request.digest
+            ):
+                raise ValueError(f"Source does not match digest {request.digest}")
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Workers of other connections may read the cache concurrently
+            partial = path.with_name(f".{path.name}.{os.getpid()}")
+            partial.write_bytes(source.source)
+            partial.replace(path)
+        return path
+
+
+def _serve_connection(connection: Connection, cache: Path):
+    try:
+        # Results are never moved through shared memory, the driver is elsewhere
+        _load_design(_SourceQueue(connection, cache), connection, None)  # type: ignore
+    except (EOFError, OSError):
+        # The driver closed the connection
+        pass
+    except ValueError:
+        # The driver sent an invalid design, the connection is dropped
+        connection.close()
+
+
+class Node:
+    """
+    Runs evaluations for drivers on other machines, see `RemoteSession`. Every
+    connection gets a worker process of its own, which speaks the same protocol as
+    a local one. Design sources are cached in `cache` by content hash, so each
+    version of a design is transferred to the node once.
+    Only the design script is transferred, modules it imports have to be installed
+    on the node.
+    """
+
+    context = multiprocessing.get_context()
+
+    def __init__(
+        self, address: Address, authkey: bytes, cache: Path | None = None
+    ) -> None:
+        self.address = address
+        self.authkey = authkey
+        self.cache = cache or Path(tempfile.gettempdir()) / "cqdf-node"
+
+    def serve(self):
+        """Accepts connections until interrupted"""
+        if self.context.get_start_method() == "fork":
+            # Workers inherit the imports instead of loading CadQuery per connection
+            from .driver import ZYGOTE_PRELOAD
+
+            for module in ZYGOTE_PRELOAD:
+                importlib.import_module(module)
+
+        self.cache.mkdir(parents=True, exist_ok=True)
+        with Listener(self.address, authkey=self.authkey) as listener:
+            while True:
+                try:
+                    connection = listener.accept()
+                except (AuthenticationError, OSError):
+                    continue
+                process = self.context.Process(
+                    target=_serve_connection,
+                    args=(connection, self.cache),
+                    daemon=True,
+                )
+                process.start()
+                connection.close()
+                # Reaps workers of closed connections
+                multiprocessing.active_children()
@@ -0,0 +1,254 @@
+import json
+import math
+import operator
+import random
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Sequence
+
+from .driver import Evaluation, Session, SessionPool
+from .interface import ParameterValue, ParameterValueResponse
+from .metrics import Metric, check_metrics, metric_name
+from .parameter import Choice, PType, Range, VType
+from .util import JSONCustomEncoder
+from .validate import Validator
+
+_OPERATORS = {"<=": operator.le, ">=": operator.ge}
+
+
+@dataclass(frozen=True)
+class Constraint:
+    """Bound on a metric of the result, e.g. `xlen <= 100`"""
+
+    metric: str
+    op: str
+    value: float
+
+    @staticmethod
+    def parse(spec: str) -> "Constraint":
+        for op in _OPERATORS:
+            metric, sep, value = spec.partition(op)
+            if sep:
+                return Constraint(metric.strip(), op, float(value))
+        raise ValueError(f"Invalid constraint '{spec}', expected metric<=value")
+
+    def violation(self, metrics: dict[str, float]) -> float:
+        value = metrics[self.metric]
+        if _OPERATORS[self.op](value, self.value):
+            return 0.0
+        return abs(value - self.value)
+
+
+@dataclass
+class Trial:
+    """One evaluated parameter set"""
+
+    parameters: dict[str, Any]
+    metrics: dict[str, float] | None = None
+    error: str | None = None
+    batch: int = 0
+
+
+class _Domain:
+    """Values a parameter can take during the search"""
+
+    def __init__(self, param: ParameterValue) -> None:
+        value = param.value
+        self.key = param.key
+        self.bounds: tuple[float, float] | None = None
+        self.choices: list[Any] | None = None
+        self.integer = value.vtype == VType.Int
+        if isinstance(value, Range):
+            self.bounds = (value.start, value.end)
+        elif isinstance(value, Choice):
+            self.choices = list(value.allowed)  # type: ignore
+        elif param.ptype == PType.Toggle:
+            self.choices = [False, True]
+
+    def sample(self, rng: random.Random) -> Any:
+        if self.choices is not None:
+            return rng.choice(self.choices)
+        low, high = self.bounds  # type: ignore
+        if self.integer:
+            return rng.randint(int(low), int(high))
+        return rng.uniform(low, high)
+
+    def perturb(self, rng: random.Random, value: Any, scale: float) -> Any:
+        """Moves a value by a step relative to the domain size"""
+        if self.choices is not None:
+            return self.sample(rng) if rng.random() < scale else value
+        low, high = self.bounds  # type: ignore
+        moved = min(max(value + rng.gauss(0, scale * (high - low)), low), high)
+        return round(moved) if self.integer else moved
+
+
+def domains(params: Sequence[ParameterValue], fixed: dict[str, Any]) -> list[_Domain]:
+    """Ranges, choices and toggles which are not fixed are searched"""
+    return [
+        _Domain(p)
+        for p in params
+        if p.key not in fixed
+        and (isinstance(p.value, (Range, Choice)) or p.ptype == PType.Toggle)
+    ]
+
+
+def _key(values: dict[str, Any]) -> str:
+    return json.dumps(values, sort_keys=True, cls=JSONCustomEncoder)
+
+
+def read_log(path: Path) -> list[Trial]:
+    """Reads the trials of an earlier run, to continue it"""
+    if not path.exists():
+        return []
+    with path.open() as f:
+        return [Trial(**json.loads(line)) for line in f if line.strip()]
+
+
+class Optimizer:
+    """
+    Searches Range, Choice and Toggle parameters of a design for the values that
+    minimise (or maximise) a metric of its result, subject to metric constraints.
+    Candidates are evaluated in batches across the workers of a pool and measured in
+    the worker. Each batch samples around the best trials so far with a step that
+    shrinks from batch to batch. The search stops after `max_evaluations` or once
+    `patience` batches in a row did not improve the best trial.
+    Every trial is appended to `log`, if given, and a run with an existing log
+    continues where it stopped.
+    """
+
+    def __init__(
+        self,
+        pool: SessionPool,
+        path: Path,
+        params: list[ParameterValue],
+        objective: Metric,
+        constraints: Sequence[Constraint] = (),
+        fixed: dict[str, Any] | None = None,
+        maximize: bool = False,
+        batch: int | None = None,
+        max_evaluations: int = 200,
+        patience: int = 5,
+        elite: int = 4,
+        step: float = 0.25,
+        shrink: float = 0.8,
+        seed: int | None = None,
+        log: Path | None = None,
+    ) -> None:
+        self.pool = pool
+        self.path = path
+        self.objective = objective
+        self.constraints = list(constraints)
+        self.maximize = maximize
+        self.batch = batch or 2 * pool.size
+        self.max_evaluations = max_evaluations
+        self.patience = patience
+        self.elite = elite
+        self.step = step
+        self.shrink = shrink
+        self.rng = random.Random(seed)
+        self.log = log
+
+        self.metrics: list[Metric] = [objective]
+        for constraint in self.constraints:
+            if constraint.metric not in map(metric_name, self.metrics):
+                self.metrics.append(constraint.metric)
+        check_metrics(self.metrics)
+
+        validated = Validator(params).validate_many([fixed or {}])[0]
+        if isinstance(validated, Exception):
+            raise validated
+        self.fixed = validated
+        self.defaults = {p.key: p.value.value for p in params}
+        self.domains = domains(params, self.fixed)
+        if not self.domains:
+            raise ValueError("The design has no Range, Choice or Toggle to optimize")
+
+        self.trials = read_log(log) if log else []
+        self.seen = {_key(t.parameters) for t in self.trials}
+
+    def score(self, trial: Trial) -> tuple[float, float]:
+        """Sort key of a trial: constraint violation first, then the objective"""
+        if trial.metrics is None:
+            return (math.inf, math.inf)
+        violation = sum(c.violation(trial.metrics) for c in self.constraints)
+        value = trial.metrics[metric_name(self.objective)]
+        return (violation, -value if self.maximize else value)
+
+    @property
+    def best(self) -> Trial | None:
+        measured = [t for t in self.trials if t.metrics is not None]
+        return min(measured, key=self.score, default=None)
+
+    def _candidate(self, batch: int) -> dict[str, Any]:
+        ranked = sorted(self.trials, key=self.score)[: self.elite]
+        ranked = [t for t in ranked if t.metrics is not None]
+        scale = self.step * self.shrink**batch
+        values: dict[str, Any] = {}
+        if ranked:
+            parent = self.rng.choice(ranked).parameters
+            for domain in self.domains:
+                values[domain.key] = domain.perturb(self.rng, parent[domain.key], scale)
+        else:
+            for domain in self.domains:
+                values[domain.key] = domain.sample(self.rng)
+        return self.defaults | self.fixed | values
+
+    def _propose(self, batch: int, count: int) -> list[dict[str, Any]]:
+        candidates: list[dict[str, Any]] = []
+        for _ in range(count * 20):
+            if len(candidates) == count:
+                break
+            values = self._candidate(batch)
+            if (key := _key(values)) not in self.seen:
+                self.seen.add(key)
+                candidates.append(values)
+        return candidates
+
+    def _measure(self, session: Session, values: dict[str, Any]) -> dict[str, float]:
+        evaluation = Evaluation(self.path, session)
+        evaluation.start()
+        return evaluation.measure(
+            [ParameterValueResponse(k, v) for k, v in values.items()],
+            self.metrics,
+        )
+
+    def _evaluate(self, values: dict[str, Any]) -> dict[str, float]:
+        return self.pool.run(lambda session: self._measure(session, values))
+
+    def run(self, on_trial: Callable[[Trial], None] | None = None) -> Trial | None:
+        """Runs until a stopping criterion is met and returns the best trial"""
+        encoder = JSONCustomEncoder(ensure_ascii=False)
+        batch = max((t.batch + 1 for t in self.trials), default=0)
+        stale = 0
+
+        with ThreadPoolExecutor(max_workers=self.pool.size) as executor:
+            while len(self.trials) < self.max_evaluations and stale < self.patience:
+                previous = self.best
+                count = min(self.batch, self.max_evaluations - len(self.trials))
+                candidates = self._propose(batch, count)
+                if not candidates:
+                    break
+
+                futures = [executor.submit(self._evaluate, c) for c in candidates]
+                for values, future in zip(candidates, futures):
+                    trial = Trial(values, batch=batch)
+                    try:
+                        trial.metrics = future.result()
+                    except Exception as e:
+                        trial.error = f"{type(e).__name__}: {e}"
+                    self.trials.append(trial)
+                    if self.log:
+                        with self.log.open("a") as f:
+                            f.write(encoder.encode(trial) + "\n")
+                    if on_trial:
+                        on_trial(trial)
+
+                best = self.best
+                improved = best is not None and (
+                    previous is None or self.score(best) < self.score(previous)
+                )
+                stale = 0 if improved else stale + 1
+                batch += 1
+
+        return self.best
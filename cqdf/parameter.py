@@ -1,6 +1,6 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Generic, Sequence, TypedDict, TypeVar
+from typing import Any, Generic, Sequence, TypedDict, TypeVar
 
 from typing_extensions import NotRequired, Unpack
 
@@ -46,6 +46,20 @@ class DesignParameters:
     ...
 
 
+_read_trackers: list[dict[int, "Value[Any]"]] = []
+"""Collect every `Value` whose `value` is read while they are active"""
+
+
+def _get_value(self: "Value[TA]") -> TA:
+    for tracker in _read_trackers:
+        tracker[id(self)] = self
+    return self._value  # type: ignore
+
+
+def _set_value(self: "Value[TA]", x: TA):
+    self._value = x
+
+
 @dataclass
 class Value(Generic[TA]):
     """Base class for all parameter types"""
@@ -53,7 +67,10 @@ class Value(Generic[TA]):
     name: str
     description: str
     unit: Unit
-    value: TA
+    # A property, so reads can be tracked. Subclasses replace only the setter.
+    value: TA = field(  # type: ignore
+        default=property(_get_value, _set_value), init=False
+    )
     vtype: VType
     category: Category | None
 
@@ -104,6 +121,7 @@ class Choice(Value[TA]):
         **options: Unpack[Options],
     ):
         self.allowed = allowed
+        self._allowed = frozenset(allowed)
         if len(allowed) == 0:
             raise ValueError("Allowed choices can not be empty.")
         if len(vtypes := set(type(v) for v in allowed)) > 1 and vtypes:
@@ -114,13 +132,19 @@ class Choice(Value[TA]):
         default = allowed[0] if default is None else default
         super().__init__(vtypes.pop()(default), **options)
 
-    @property
-    def value(self):
-        return self._value
+    def __getstate__(self):
+        # Sets are ordered by hash, which differs between processes
+        state = self.__dict__.copy()
+        del state["_allowed"]
+        return state
 
-    @value.setter
+    def __setstate__(self, state: dict[str, Any]):
+        self.__dict__.update(state)
+        self._allowed = frozenset(self.allowed)
+
+    @Value.value.setter  # type: ignore
     def value(self, x: TA):
-        if not x in self.allowed:
+        if not x in self._allowed:
             raise ValueError(
                 f"Value out of range. Should be one of '{self.allowed}' but was '{x}'"
             )
@@ -149,11 +173,7 @@ class Range(Numeric[TN]):
         )
         super().__init__(vtype(default), **options)
 
-    @property
-    def value(self):
-        return self._value
-
-    @value.setter
+    @Value.value.setter  # type: ignore
     def value(self, x: TN):
         if not self.start <= x <= self.end:
             raise ValueError(
@@ -0,0 +1,231 @@
+import ast
+import hashlib
+import pickle
+from copy import deepcopy
+from pathlib import Path
+from typing import Any, Iterator
+
+from .interface import ParameterValue, Schema, make_parameter
+from .parameter import Category, DesignParameters, PType, Unit, Value
+from .util import file_hash
+
+_schemas: dict[str, list[ParameterValue]] = {}
+_wire_schemas: dict[str, list[ParameterValue]] = {}
+
+
+class NotStaticError(Exception):
+    """The parameters of a design can not be determined without executing it"""
+
+
+def _literal(node: ast.expr, constants: dict[str, Any]) -> Any:
+    """
+    Evaluates literals, `Unit` members and `Category` instances, either inline or
+    assigned to a module-level name
+    """
+    if isinstance(node, ast.Name) and node.id in constants:
+        return constants[node.id]
+    if (
+        isinstance(node, ast.Attribute)
+        and isinstance(node.value, ast.Name)
+        and node.value.id == Unit.__name__
+    ):
+        return Unit[node.attr]
+    if (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Name)
+        and node.func.id == Category.__name__
+    ):
+        return Category(
+            *(_literal(arg, constants) for arg in node.args),
+            **{
+                kw.arg: _literal(kw.value, constants)
+                for kw in node.keywords
+                if kw.arg is not None
+            },
+        )
+    try:
+        return ast.literal_eval(node)
+    except ValueError as e:
+        raise NotStaticError(ast.unparse(node)) from e
+
+
+def _find_params_class(tree: ast.Module) -> ast.ClassDef:
+    classes = {
+        node.name: node
+        for node in tree.body
+        if isinstance(node, ast.ClassDef)
+        and any(
+            isinstance(base, ast.Name) and base.id == DesignParameters.__name__
+            for base in node.bases
+        )
+    }
+
+    # Prefer the class handed to `user_input`
+    for node in ast.walk(tree):
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and node.func.id == "user_input"
+            and node.args
+            and isinstance(node.args[0], ast.Name)
+        ):
+            if node.args[0].id in classes:
+                return classes[node.args[0].id]
+            raise NotStaticError(f"Unknown parameter class {node.args[0].id}")
+
+    if len(classes) != 1:
+        raise NotStaticError("No unique DesignParameters subclass")
+    return next(iter(classes.values()))
+
+
+def _module_scope(node: ast.AST) -> Iterator[ast.AST]:
+    """Walks a statement without entering the bodies of functions and classes"""
+    yield node
+    if isinstance(node, _SCOPES):
+        return
+    for child in ast.iter_child_nodes(node):
+        yield from _module_scope(child)
+
+
+_SCOPES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Lambda)
+
+
+def _bound_names(node: ast.stmt) -> set[str]:
+    """
+    Names a module-level statement may bind, including through `global` in the
+    functions it defines
+    """
+    names: set[str] = set()
+    for child in _module_scope(node):
+        if isinstance(child, ast.Name) and not isinstance(child.ctx, ast.Load):
+            names.add(child.id)
+        elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(child.name)
+        elif isinstance(child, ast.alias):
+            names.add((child.asname or child.name).partition(".")[0])
+        elif isinstance(child, (ast.ExceptHandler, ast.MatchAs, ast.MatchStar)):
+            names.add(child.name or "")
+        elif isinstance(child, ast.MatchMapping):
+            names.add(child.rest or "")
+    for child in ast.walk(node):
+        if isinstance(child, (ast.Global, ast.Nonlocal)):
+            names.update(child.names)
+    return names
+
+
+def static_parameters(source: str) -> list[ParameterValue]:
+    """
+    Reads the parameters of a design from its source, without executing it.
+    Raises `NotStaticError` if any parameter is not constructed from literals.
+    """
+    tree = ast.parse(source)
+    params_cls = _find_params_class(tree)
+
+    # Only what is bound when the class body runs counts
+    constants: dict[str, Any] = {}
+    for node in tree.body[: tree.body.index(params_cls)]:
+        if (
+            isinstance(node, ast.Assign)
+            and len(node.targets) == 1
+            and isinstance(node.targets[0], ast.Name)
+        ):
+            try:
+                constants[node.targets[0].id] = _literal(node.value, constants)
+            except (NotStaticError, LookupError, TypeError, ValueError):
+                constants.pop(node.targets[0].id, None)
+        elif "*" in (names := _bound_names(node)):
+            # A star import may rebind any name
+            constants.clear()
+        else:
+            for name in names:
+                constants.pop(name, None)
+
+    parameters: list[ParameterValue] = []
+    for node in params_cls.body:
+        if isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+            if node.value is None:
+                # A bare annotation defines no attribute
+                continue
+            target, value = node.target, node.value
+        elif (
+            isinstance(node, ast.Assign)
+            and len(node.targets) == 1
+            and isinstance(node.targets[0], ast.Name)
+        ):
+            target, value = node.targets[0], node.value
+        elif (
+            isinstance(node, (ast.Pass, ast.FunctionDef, ast.AsyncFunctionDef))
+            or isinstance(node, ast.Expr)
+            and isinstance(node.value, ast.Constant)
+            and isinstance(node.value.value, str)
+        ):
+            continue
+        else:
+            # Parameters defined any other way would be missing from the schema
+            raise NotStaticError(ast.unparse(node))
+        if target.id.startswith("_"):
+            constants.pop(target.id, None)
+            continue
+        if not isinstance(value, ast.Call):
+            # Plain class attributes are not parameters, but shadow module constants
+            constants[target.id] = _literal(value, constants)
+            continue
+        constants.pop(target.id, None)
+        if not isinstance(value.func, ast.Name):
+            raise NotStaticError(ast.unparse(value))
+        if value.func.id not in PType.__members__:
+            raise NotStaticError(f"Unknown parameter type {value.func.id}")
+
+        args = [_literal(arg, constants) for arg in value.args]
+        kwargs = {
+            kw.arg: _literal(kw.value, constants)
+            for kw in value.keywords
+            if kw.arg is not None
+        }
+        if len(kwargs) != len(value.keywords):
+            raise NotStaticError(ast.unparse(value))
+
+        param: Value[Any] = PType[value.func.id].value(*args, **kwargs)
+        parameters.append(make_parameter(target.id, param))
+
+    return parameters
+
+
+def lookup_schema(path: Path) -> list[ParameterValue] | None:
+    """
+    Returns the parameters of the design at `path` from the schema cache or by
+    reading its source. Returns None if the design has to be executed.
+    """
+    digest = file_hash(path)
+    if digest not in _schemas:
+        try:
+            _schemas[digest] = static_parameters(path.read_text())
+        except (NotStaticError, LookupError, ValueError, TypeError):
+            return None
+    return deepcopy(_schemas[digest])
+
+
+def remember_schema(path: Path, parameters: list[ParameterValue]) -> str:
+    """Stores the parameters an executed design provided. Returns the file hash."""
+    digest = file_hash(path)
+    _schemas[digest] = deepcopy(parameters)
+    return digest
+
+
+def schema_digest(parameters: list[ParameterValue]) -> str:
+    """Hash identifying the parameters a design provides, including their defaults"""
+    return hashlib.sha256(
+        pickle.dumps(parameters, protocol=pickle.HIGHEST_PROTOCOL)
+    ).hexdigest()
+
+
+def resolve_schema(schema: Schema) -> list[ParameterValue] | None:
+    """
+    Returns the parameters of a schema received from a worker, remembering them for
+    later references by digest. Returns None for an unknown reference.
+    """
+    if schema.parameters is not None:
+        _wire_schemas[schema.digest] = schema.parameters
+    elif schema.digest not in _wire_schemas:
+        return None
+    return list(_wire_schemas[schema.digest])
@@ -0,0 +1,80 @@
+import pickle
+from dataclasses import dataclass
+from multiprocessing.connection import Connection
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any
+
+DEFAULT_SHM_THRESHOLD = 2**20
+"""Results of at least this many bytes are moved through shared memory"""
+
+
+@dataclass(frozen=True)
+class SharedPayload:
+    """Handle of a pickled object placed in a shared memory block"""
+
+    name: str
+    size: int
+
+
+def dumps(obj: Any) -> bytes:
+    return pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def send(connection: Connection, obj: Any, threshold: int | None):
+    """
+    Sends `obj` over the connection. If its pickled form reaches `threshold` bytes,
+    it is written to a shared memory block instead and only the handle is sent.
+    The receiver releases the block in `receive`, or in `discard` if it never reads it.
+    """
+    send_bytes(connection, dumps(obj), threshold)
+
+
+def send_bytes(connection: Connection, data: bytes, threshold: int | None):
+    """Sends an object already pickled with `dumps`, see `send`"""
+    if threshold is None or len(data) < threshold:
+        connection.send_bytes(data)
+        return
+
+    shm = SharedMemory(create=True, size=len(data))
+    try:
+        shm.buf[: len(data)] = data
+        # Stays registered with the resource tracker, which the driver shares, until
+        # the receiver unlinks it. Blocks of a crashed worker are freed on exit.
+        connection.send(SharedPayload(shm.name, len(data)))
+    finally:
+        shm.close()
+
+
+def receive(connection: Connection) -> Any:
+    """Receives an object sent with `send`"""
+    obj = connection.recv()
+    if not isinstance(obj, SharedPayload):
+        return obj
+
+    shm = SharedMemory(obj.name)
+    try:
+        with shm.buf[: obj.size] as view:
+            return pickle.loads(view)
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def discard(connection: Connection):
+    """
+    Releases the shared memory blocks of messages that were sent but will never be
+    received, because the sender has been stopped. Other messages are dropped
+    without unpickling them.
+    """
+    try:
+        while connection.poll():
+            data = connection.recv_bytes()
+            # Handles are tiny, results are not worth unpickling
+            if len(data) <= 1024 and b"SharedPayload" in data:
+                obj = pickle.loads(data)
+                if isinstance(obj, SharedPayload):
+                    shm = SharedMemory(obj.name)
+                    shm.close()
+                    shm.unlink()
+    except (EOFError, OSError):
+        pass
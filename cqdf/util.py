@@ -1,6 +1,8 @@
+import hashlib
 from dataclasses import asdict, is_dataclass
 from enum import Enum
 from json import JSONEncoder
+from pathlib import Path
 from typing import Any, Callable, Iterable, TypeVar
 
 
@@ -32,3 +34,10 @@ class JSONCustomEncoder(JSONEncoder):
         if is_dataclass(o):
             return asdict(o)
         return super().default(o)
+
+
+def file_hash(path: Path) -> str:
+    """
+    Returns the SHA-256 hex digest of a file's content
+    """
+    return hashlib.sha256(path.read_bytes()).hexdigest()
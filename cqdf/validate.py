@@ -0,0 +1,135 @@
+from typing import Any, Callable, Iterable, Sequence
+
+from .interface import ParameterValue, ParameterValueResponse
+from .parameter import Choice, Range, VType
+
+Check = Callable[[Any], Any]
+
+
+def _coerce(key: str, vtype: VType) -> Check:
+    """Accepts values of the parameter's type and converts lossless ones to it"""
+
+    def wrong_type(x: Any):
+        return TypeError(
+            f"Received value for parameter {key}, which is of wrong type. "
+            + f"Expected {vtype.value}, but received {type(x)}"
+        )
+
+    match vtype:
+        case VType.Float:
+
+            def coerce(x: Any) -> Any:
+                if isinstance(x, float):
+                    return x
+                if isinstance(x, int) and not isinstance(x, bool):
+                    return float(x)
+                raise wrong_type(x)
+
+        case VType.Int:
+
+            def coerce(x: Any) -> Any:
+                if isinstance(x, int) and not isinstance(x, bool):
+                    return x
+                if isinstance(x, float) and x.is_integer():
+                    return int(x)
+                raise wrong_type(x)
+
+        case _:
+            expected = vtype.value
+
+            def coerce(x: Any) -> Any:
+                if isinstance(x, expected):
+                    return x
+                raise wrong_type(x)
+
+    return coerce
+
+
+def _compile(param: ParameterValue) -> Check:
+    key, value = param.key, param.value
+    coerce = _coerce(key, value.vtype)
+
+    if isinstance(value, Choice):
+        allowed = frozenset(value.allowed)  # type: ignore
+
+        def check(x: Any) -> Any:
+            if (x := coerce(x)) not in allowed:
+                raise ValueError(
+                    f"Received invalid value for parameter {key}. "
+                    + f"Should be one of the allowed choices but was '{x}'"
+                )
+            return x
+
+    elif isinstance(value, Range):
+        start, end = value.start, value.end
+
+        def check(x: Any) -> Any:
+            if not start <= (x := coerce(x)) <= end:
+                raise ValueError(
+                    f"Received invalid value for parameter {key}. "
+                    + f"Should be between '{start}' and '{end}' but was '{x}'"
+                )
+            return x
+
+    else:
+        check = coerce
+
+    return check
+
+
+class Validator:
+    """
+    Checks parameter values against the parameters of a design before they are sent
+    to the worker. The checks are compiled once per schema: choices become hashed
+    sets and bounds are bound to plain comparisons.
+    """
+
+    def __init__(self, params: Sequence[ParameterValue]) -> None:
+        self.checks = {p.key: _compile(p) for p in params}
+
+    def validate(
+        self, res_params: Iterable[ParameterValueResponse]
+    ) -> list[ParameterValueResponse]:
+        """
+        Returns the responses with their values converted to the parameters' types.
+        Raises `LookupError`, `TypeError` or `ValueError` like the worker would.
+        """
+        checks = self.checks
+        validated: list[ParameterValueResponse] = []
+        for res_param in res_params:
+            if (check := checks.get(res_param.key)) is None:
+                raise LookupError(f"Received unrecognized parameter {res_param.key}")
+            validated.append(
+                ParameterValueResponse(res_param.key, check(res_param.value))
+            )
+        return validated
+
+    def validate_many(
+        self, sets: Iterable[dict[str, Any]]
+    ) -> list[dict[str, Any] | Exception]:
+        """
+        Validates many parameter sets at once. Returns each set with converted
+        values, or the exception describing why it is invalid.
+        """
+        checks = self.checks
+        results: list[dict[str, Any] | Exception] = []
+        for values in sets:
+            try:
+                results.append({key: checks[key](x) for key, x in values.items()})
+            except KeyError as e:
+                results.append(
+                    LookupError(f"Received unrecognized parameter {e.args[0]}")
+                )
+            except (TypeError, ValueError) as e:
+                results.append(e)
+        return results
+
+
+_validators: dict[str, Validator] = {}
+
+
+def schema_validator(digest: str, params: Sequence[ParameterValue]) -> Validator:
+    """Returns the validator of a schema, compiling it on first use"""
+    if (validator := _validators.get(digest)) is None:
+        validator = _validators[digest] = Validator(params)
+    return validator
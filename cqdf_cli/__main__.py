@@ -1,16 +1,38 @@
 from argparse import ArgumentParser
+from dataclasses import replace
 from pathlib import Path
 
-from cadquery import exporters
-from cqdf.driver import Evaluation, Session
-from cqdf.interface import ParameterValueResponse
+from cqdf.driver import Evaluation, Session, SessionPool
+from cqdf.interface import ParameterValue, ParameterValueResponse
+from cqdf.node import Node, parse_address
+from cqdf.optimize import Constraint, Optimizer, Trial
+from cqdf.schema import lookup_schema
 from cqdf.util import JSONCustomEncoder
 from rich import print as richprint
 from rich import print_json
 
-from cqdf_cli.util import describe_parameters
+from cqdf_cli.util import (
+    describe_parameters,
+    describe_timings,
+    export_targets,
+    parse_nodes,
+    read_authkey,
+)
 
-from .models import ExecuteCLIArgs, ParseCLIArgs, from_ns
+from .models import (
+    ExecuteCLIArgs,
+    NodeCLIArgs,
+    OptimizeCLIArgs,
+    ParseCLIArgs,
+    ServeCLIArgs,
+    SweepCLIArgs,
+    WatchCLIArgs,
+    from_ns,
+)
+from .optimize import describe_trial, load_objective, parse_fixed
+from .serve import serve
+from .sweep import check_template, expand, read_sets, run_sweep
+from .watch import watch
 
 PARAM_PREFIX = "p:"
 
@@ -39,6 +61,63 @@ exec_parser.add_argument(
     help="The file to execute",
 )
 exec_parser.add_argument(
+    "-o",
+    "--out",
+    nargs="+",
+    type=Path,
+    default=[Path("out.step")],
+    help="Output file paths, the format is derived from the suffix",
+)
+exec_parser.add_argument(
+    "-t",
+    "--tolerance",
+    action="append",
+    default=[],
+    help="Tessellation tolerance as `value` or `format=value`, e.g. `stl=0.01`",
+)
+exec_parser.add_argument(
+    "-a",
+    "--angular-tolerance",
+    action="append",
+    default=[],
+    help="Angular tessellation tolerance as `value` or `format=value`",
+)
+exec_parser.add_argument(
+    "--parts",
+    action="store_true",
+    help="Write every part the design emits as soon as it is built, "
+    + "to the output paths with the part name appended",
+)
+exec_parser.add_argument(
+    "--profile",
+    nargs="?",
+    const="-",
+    metavar="PATH",
+    help="Write the seconds spent in each phase of the evaluation as JSON to this "
+    + "file and print them as a table, or print the JSON if no file is given",
+)
+exec_parser.add_argument(
+    "--cprofile",
+    type=Path,
+    help="Run the design under cProfile and write the statistics to this file",
+)
+exec_parser.add_argument(
+    "--p:<name>",
+    required=False,
+    nargs="*",
+    dest="value",
+    help="Set a specific parameter value. Use `params` to see valid parameter names",
+)
+
+## Watch Command
+watch_parser = sub_parsers.add_parser("watch")
+watch_parser.add_argument(
+    "input",
+    nargs="?",
+    type=Path,
+    help="The file to watch",
+)
+watch_parser.add_argument(
     "-o",
     "--out",
     nargs="?",
@@ -46,7 +125,7 @@ exec_parser.add_argument(
     default="out.step",
     help="Output file path",
 )
-exec_parser.add_argument(
+watch_parser.add_argument(
     "--p:<name>",
     required=False,
     nargs="*",
@@ -54,48 +133,315 @@ exec_parser.add_argument(
     help="Set a specific parameter value. Use `params` to see valid parameter names",
 )
 
+## Sweep Command
+sweep_parser = sub_parsers.add_parser("sweep")
+sweep_parser.add_argument(
+    "input",
+    nargs="?",
+    type=Path,
+    help="The file to execute",
+)
+sweep_parser.add_argument(
+    "-o",
+    "--out",
+    default="out/{index}.step",
+    help="Output file path template, e.g. `out/{size}_{font}.step`",
+)
+sweep_parser.add_argument(
+    "-g",
+    "--grid",
+    action="append",
+    default=[],
+    help="Grid axis as `key=a,b,c`, `key=start:end:step` or `key=*` for all choices",
+)
+sweep_parser.add_argument(
+    "-s",
+    "--sets",
+    type=Path,
+    help="CSV or JSONL file of parameter sets, combined with every grid point",
+)
+sweep_parser.add_argument(
+    "-w", "--workers", type=int, help="Number of workers (default: CPU count)"
+)
+sweep_parser.add_argument(
+    "-N",
+    "--node",
+    action="append",
+    default=[],
+    help="Worker node as `host:port` or `host:port*workers`, in addition to the "
+    + "local workers. The key is read from $CQDF_AUTHKEY",
+)
+sweep_parser.add_argument(
+    "-m",
+    "--manifest",
+    type=Path,
+    default="manifest.jsonl",
+    help="JSONL file recording every evaluated parameter set",
+)
+
+## Optimize Command
+optimize_parser = sub_parsers.add_parser("optimize")
+optimize_parser.add_argument(
+    "input",
+    nargs="?",
+    type=Path,
+    help="The file to optimize",
+)
+optimize_parser.add_argument(
+    "-o",
+    "--objective",
+    default="volume",
+    help="Metric to minimise: volume, area, xlen, ylen, zlen or `module:function` "
+    + "of a module next to the design, called with the result",
+)
+optimize_parser.add_argument(
+    "--maximize", action="store_true", help="Maximise the objective instead"
+)
+optimize_parser.add_argument(
+    "-c",
+    "--constraint",
+    action="append",
+    default=[],
+    help="Bound on a metric as `metric<=value` or `metric>=value`, e.g. `xlen<=100`",
+)
+optimize_parser.add_argument(
+    "-f",
+    "--fix",
+    action="append",
+    default=[],
+    help="Exclude a parameter from the search as `key=value`",
+)
+optimize_parser.add_argument(
+    "-b", "--batch", type=int, help="Candidates per batch (default: twice the workers)"
+)
+optimize_parser.add_argument(
+    "-n",
+    "--max-evaluations",
+    type=int,
+    default=200,
+    help="Evaluations after which the search stops, including logged ones",
+)
+optimize_parser.add_argument(
+    "--patience",
+    type=int,
+    default=5,
+    help="Batches without improvement after which the search stops",
+)
+optimize_parser.add_argument(
+    "-w", "--workers", type=int, help="Number of workers (default: CPU count)"
+)
+optimize_parser.add_argument(
+    "-N",
+    "--node",
+    action="append",
+    default=[],
+    help="Worker node as `host:port` or `host:port*workers`, in addition to the "
+    + "local workers. The key is read from $CQDF_AUTHKEY",
+)
+optimize_parser.add_argument(
+    "-l",
+    "--log",
+    type=Path,
+    default="optimize.jsonl",
+    help="JSONL file recording every evaluation, an existing one is continued",
+)
+optimize_parser.add_argument("--seed", type=int, help="Seed of the random search")
+
+## Node Command
+node_parser = sub_parsers.add_parser("node")
+node_parser.add_argument(
+    "address",
+    nargs="?",
+    default="127.0.0.1:7000",
+    help="`host:port` or path of a Unix socket to listen on. "
+    + "The key drivers have to present is read from $CQDF_AUTHKEY",
+)
+node_parser.add_argument(
+    "-c",
+    "--cache",
+    type=Path,
+    help="Directory of the received design sources (default: temporary directory)",
+)
+
+## Serve Command
+serve_parser = sub_parsers.add_parser("serve")
+serve_parser.add_argument(
+    "root",
+    nargs="?",
+    type=Path,
+    default=".",
+    help="Directory containing the designs to serve",
+)
+serve_parser.add_argument("--host", default="127.0.0.1", help="Address to bind to")
+serve_parser.add_argument("-p", "--port", type=int, default=8080, help="Port")
+serve_parser.add_argument(
+    "-w", "--workers", type=int, help="Number of workers (default: CPU count)"
+)
+serve_parser.add_argument(
+    "-q",
+    "--queue-size",
+    type=int,
+    default=32,
+    help="Requests that may wait for a worker before new ones are rejected",
+)
+
 cli_args = from_ns(parser.parse_known_args()[0])
 
 
-if not (
+def parse_param_args(
+    sub_parser: ArgumentParser, params: list[ParameterValue]
+) -> list[ParameterValueResponse]:
+    """Adds an argument per design parameter and parses the command line again"""
+    param_group = sub_parser.add_argument_group("Parameters")
+    for p in params:
+        param_group.add_argument(
+            f"--{PARAM_PREFIX}{p.key}",
+            required=False,
+            type=p.value.vtype.value,
+            default=p.value.value,
+        )
+    exec_params = vars(parser.parse_args())
+
+    return [
+        ParameterValueResponse(key.removeprefix(PARAM_PREFIX), exec_params[key])
+        for key in exec_params
+        if key.startswith(PARAM_PREFIX)
+    ]
+
+
+def session_pool(workers: int | None, nodes: list[str]) -> SessionPool:
+    if not nodes:
+        return SessionPool(workers)
+    return SessionPool(workers, nodes=parse_nodes(nodes), authkey=read_authkey())
+
+
+if not isinstance(cli_args, (ServeCLIArgs, NodeCLIArgs)) and not (
     cli_args.input.exists()
     and cli_args.input.is_file()
     and cli_args.input.suffix == ".py"
 ):
     raise FileNotFoundError("Invalid file", cli_args.input)
 
+
+def report_trial(trial: Trial):
+    if trial.error:
+        richprint(f"[red]{trial.parameters}: {trial.error}[/red]")
+    else:
+        richprint(f"{trial.parameters}: {trial.metrics}")
+
+
 # Evaluate
-with Session() as session:
+match cli_args:
+    case ParseCLIArgs():
+        params = lookup_schema(cli_args.input)
+        if params is None:
+            with Session() as session:
+                params = Evaluation(cli_args.input, session).start_params()
 
-    evaluation = Evaluation(cli_args.input, session)
-    match cli_args:
-        case ParseCLIArgs():
-            params = evaluation.start_params()
+        if cli_args.json:
+            print_json(JSONCustomEncoder().encode(params))
+        else:
+            richprint(describe_parameters(params))
 
-            if cli_args.json:
-                print_json(JSONCustomEncoder().encode(params))
+    case ExecuteCLIArgs():
+        with Session() as session:
+            evaluation = Evaluation(
+                cli_args.input, session, profile=cli_args.cprofile is not None
+            )
+            params = evaluation.start()
+            res_params = parse_param_args(exec_parser, params)
+
+            targets = export_targets(
+                cli_args.out, cli_args.tolerance, cli_args.angular_tolerance
+            )
+            if cli_args.parts:
+                # Loads CadQuery, the parts are exported here
+                from cqdf.export import export
+
+                for part in evaluation.parts(res_params):
+                    for target in targets:
+                        path = target.path.with_stem(f"{target.path.stem}_{part.name}")
+                        exported = export(part.shape, replace(target, path=path))
+                        richprint(f"{exported.path} ({exported.size} bytes)")
             else:
-                richprint(describe_parameters(params))
+                for exported in evaluation.finish(res_params, targets):
+                    richprint(f"{exported.path} ({exported.size} bytes)")
 
-        case ExecuteCLIArgs():
-            params = evaluation.start()
+            if cli_args.profile == "-":
+                print_json(JSONCustomEncoder().encode(evaluation.timings))
+            elif cli_args.profile:
+                timings = JSONCustomEncoder().encode(evaluation.timings)
+                Path(cli_args.profile).write_text(timings)
+                richprint(describe_timings(evaluation.timings))
+            if cli_args.cprofile and evaluation.stats:
+                evaluation.stats.dump_stats(cli_args.cprofile)
+
+    case WatchCLIArgs():
+        try:
+            watch(
+                cli_args.input,
+                cli_args.out,
+                lambda params: parse_param_args(watch_parser, params),
+            )
+        except KeyboardInterrupt:
+            pass
+
+    case SweepCLIArgs():
+        with session_pool(cli_args.workers, cli_args.node) as pool:
+            params = lookup_schema(cli_args.input)
+            if params is None:
+                with pool.acquire() as session:
+                    params = Evaluation(cli_args.input, session).start_params()
+
+            check_template(cli_args.out, params)
+            sets = expand(
+                params,
+                cli_args.grid,
+                read_sets(cli_args.sets) if cli_args.sets else [],
+            )
+            with cli_args.manifest.open("w") as manifest:
+                run_sweep(pool, cli_args.input, params, sets, cli_args.out, manifest)
+
+    case OptimizeCLIArgs():
+        with session_pool(cli_args.workers, cli_args.node) as pool:
+            params = lookup_schema(cli_args.input)
+            if params is None:
+                with pool.acquire() as session:
+                    params = Evaluation(cli_args.input, session).start_params()
+
+            optimizer = Optimizer(
+                pool,
+                cli_args.input,
+                params,
+                load_objective(cli_args.objective, cli_args.input.parent),
+                [Constraint.parse(c) for c in cli_args.constraint],
+                parse_fixed(params, cli_args.fix),
+                maximize=cli_args.maximize,
+                batch=cli_args.batch,
+                max_evaluations=cli_args.max_evaluations,
+                patience=cli_args.patience,
+                seed=cli_args.seed,
+                log=cli_args.log,
+            )
+            best = optimizer.run(report_trial)
+            if best is None:
+                richprint("[red]No evaluation succeeded[/red]")
+            else:
+                richprint(describe_trial(best))
+
+    case NodeCLIArgs():
+        try:
+            Node(
+                parse_address(cli_args.address), read_authkey(), cli_args.cache
+            ).serve()
+        except KeyboardInterrupt:
+            pass
 
-            param_group = exec_parser.add_argument_group("Parameters")
-            for p in params:
-                param_group.add_argument(
-                    f"--{PARAM_PREFIX}{p.key}",
-                    required=False,
-                    type=p.value.vtype.value,
-                    default=p.value.value,
-                )
-            exec_params = vars(parser.parse_args())
-
-            res_params = [
-                ParameterValueResponse(key.removeprefix(PARAM_PREFIX), exec_params[key])
-                for key in exec_params
-                if key.startswith(PARAM_PREFIX)
-            ]
-
-            shape = evaluation.finish(res_params)
-            if shape:
-                exporters.export(shape, str(cli_args.out))  # type: ignore
+    case ServeCLIArgs():
+        serve(
+            cli_args.host,
+            cli_args.port,
+            cli_args.root,
+            cli_args.workers,
+            cli_args.queue_size,
+        )
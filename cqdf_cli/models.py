@@ -8,21 +8,79 @@ from dacite.core import from_dict
 
 def from_ns(ns: Namespace):
     base = from_dict(CLIArgs, vars(ns))
-    dtype = ExecuteCLIArgs if base.command == "execute" else ParseCLIArgs
+    dtype = {
+        "execute": ExecuteCLIArgs,
+        "params": ParseCLIArgs,
+        "sweep": SweepCLIArgs,
+        "optimize": OptimizeCLIArgs,
+        "node": NodeCLIArgs,
+        "watch": WatchCLIArgs,
+        "serve": ServeCLIArgs,
+    }[base.command]
     return from_dict(dtype, vars(ns))
 
 
 @dataclass
 class CLIArgs:
-    command: Literal["execute", "params"]
+    command: Literal["execute", "params", "sweep", "optimize", "node", "watch", "serve"]
     input: Path = field(default_factory=Path)
 
 
 @dataclass
 class ExecuteCLIArgs(CLIArgs):
-    out: Path = field(default_factory=Path)
+    out: list[Path] = field(default_factory=list)
+    tolerance: list[str] = field(default_factory=list)
+    angular_tolerance: list[str] = field(default_factory=list)
+    parts: bool = False
+    profile: str | None = None
+    cprofile: Path | None = None
 
 
 @dataclass
 class ParseCLIArgs(CLIArgs):
     json: bool = False
+
+
+@dataclass
+class WatchCLIArgs(CLIArgs):
+    out: Path = field(default_factory=Path)
+
+
+@dataclass
+class SweepCLIArgs(CLIArgs):
+    out: str = "out/{index}.step"
+    grid: list[str] = field(default_factory=list)
+    sets: Path | None = None
+    workers: int | None = None
+    node: list[str] = field(default_factory=list)
+    manifest: Path = field(default_factory=lambda: Path("manifest.jsonl"))
+
+
+@dataclass
+class OptimizeCLIArgs(CLIArgs):
+    objective: str = "volume"
+    maximize: bool = False
+    constraint: list[str] = field(default_factory=list)
+    fix: list[str] = field(default_factory=list)
+    batch: int | None = None
+    max_evaluations: int = 200
+    patience: int = 5
+    workers: int | None = None
+    node: list[str] = field(default_factory=list)
+    log: Path = field(default_factory=lambda: Path("optimize.jsonl"))
+    seed: int | None = None
+
+
+@dataclass
+class NodeCLIArgs(CLIArgs):
+    address: str = "127.0.0.1:7000"
+    cache: Path | None = None
+
+
+@dataclass
+class ServeCLIArgs(CLIArgs):
+    root: Path = field(default_factory=Path)
+    host: str = "127.0.0.1"
+    port: int = 8080
+    workers: int | None = None
+    queue_size: int = 32
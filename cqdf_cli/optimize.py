@@ -0,0 +1,53 @@
+import importlib
+import sys
+from pathlib import Path
+from typing import Any
+
+from cqdf.interface import ParameterValue
+from cqdf.metrics import METRICS, Metric
+from cqdf.optimize import Trial
+from rich.table import Table
+
+from .sweep import parse_value
+
+
+def load_objective(spec: str, directory: Path) -> Metric:
+    """
+    Returns a built-in metric by name or a function given as `module:function`.
+    The module is imported from the design's directory, the worker imports it the
+    same way to run the function on the result.
+    """
+    if spec in METRICS or ":" not in spec:
+        return spec
+    module_name, _, function = spec.partition(":")
+    sys.path.insert(0, str(directory))
+    try:
+        module = importlib.import_module(module_name)
+    finally:
+        sys.path.remove(str(directory))
+    return getattr(module, function)
+
+
+def parse_fixed(params: list[ParameterValue], specs: list[str]) -> dict[str, Any]:
+    """Parses `key=value` pairs of parameters excluded from the search"""
+    vtypes = {p.key: p.value.vtype for p in params}
+    fixed: dict[str, Any] = {}
+    for spec in specs:
+        key, sep, raw = spec.partition("=")
+        if not sep:
+            raise ValueError(f"Invalid value '{spec}', expected key=value")
+        if key not in vtypes:
+            raise LookupError(f"Received unrecognized parameter {key}")
+        fixed[key] = parse_value(vtypes[key], raw)
+    return fixed
+
+
+def describe_trial(trial: Trial):
+    table = Table(title=f"Best of batch {trial.batch}")
+    table.add_column("Key", style="cyan")
+    table.add_column("Value")
+    for key, value in trial.parameters.items():
+        table.add_row(key, str(value))
+    for name, value in (trial.metrics or {}).items():
+        table.add_row(name, f"{value:.6g}", style="green")
+    return table
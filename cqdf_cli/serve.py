@@ -0,0 +1,260 @@
+import json
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Iterator
+from urllib.parse import parse_qs, urlparse
+
+from cqdf.driver import DesignError, Evaluation, Session, SessionPool, WorkerError
+from cqdf.interface import ExportTarget, ParameterValueResponse
+from cqdf.schema import lookup_schema
+from cqdf.util import JSONCustomEncoder
+from dacite.core import from_dict
+from dacite.exceptions import DaciteError
+
+FORMATS = {
+    "step",
+    "stp",
+    "stl",
+    "amf",
+    "3mf",
+    "svg",
+    "dxf",
+    "vrml",
+    "vtp",
+    "tjs",
+    "gltf",
+    "glb",
+    "xml",
+    "vtkjs",
+}
+"""Export formats a client may request"""
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+"""Upper bounds in seconds of the latency histogram buckets"""
+
+
+class Histogram:
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+
+    def describe(self) -> dict[str, Any]:
+        return {
+            "buckets": dict(zip([*map(str, BUCKETS), "+Inf"], self.counts)),
+            "count": sum(self.counts),
+            "sum": round(self.total, 6),
+        }
+
+
+class Metrics:
+    """Queue depth, per-phase latencies and worker utilisation of the server"""
+
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self.lock = threading.Lock()
+        self.queued = 0
+        self.busy = 0
+        self.rejected = 0
+        self.requests: dict[str, int] = {}
+        self.phases: dict[str, Histogram] = {}
+        self.busy_time = 0.0
+        self.started = time.monotonic()
+
+    def observe(self, phase: str, seconds: float):
+        with self.lock:
+            self.phases.setdefault(phase, Histogram()).observe(seconds)
+
+    def count(self, status: int):
+        with self.lock:
+            key = str(int(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+    def describe(self) -> dict[str, Any]:
+        with self.lock:
+            uptime = time.monotonic() - self.started
+            return {
+                "queue_depth": self.queued,
+                "busy_workers": self.busy,
+                "workers": self.workers,
+                "utilisation": round(self.busy_time / (uptime * self.workers), 4),
+                "rejected": self.rejected,
+                "requests": dict(self.requests),
+                "latency": {k: v.describe() for k, v in self.phases.items()},
+            }
+
+
+class HTTPError(Exception):
+    def __init__(self, status: HTTPStatus, message: str) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class EvaluationServer(ThreadingHTTPServer):
+    """
+    Serves `params` and `execute` for designs below `root` from a pool of warm
+    sessions. At most `queue_size` requests wait for a worker, further requests are
+    rejected with 503 until the queue drains.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        pool: SessionPool,
+        root: Path,
+        queue_size: int,
+    ) -> None:
+        super().__init__(address, RequestHandler)
+        self.pool = pool
+        self.root = root.resolve()
+        self.slots = threading.BoundedSemaphore(pool.size + queue_size)
+        self.metrics = Metrics(pool.size)
+
+    def design(self, name: str | None) -> Path:
+        if not name:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Missing design")
+        path = (self.root / name).resolve()
+        if not (
+            path.is_relative_to(self.root) and path.is_file() and path.suffix == ".py"
+        ):
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"Unknown design {name}")
+        return path
+
+    @contextmanager
+    def worker(self) -> Iterator[Session]:
+        """
+        Reserves a queue slot, or rejects the request if none is left, and waits for
+        an idle session
+        """
+        metrics = self.metrics
+        if not self.slots.acquire(blocking=False):
+            with metrics.lock:
+                metrics.rejected += 1
+            raise HTTPError(HTTPStatus.SERVICE_UNAVAILABLE, "Queue is full")
+        try:
+            with metrics.lock:
+                metrics.queued += 1
+            waited = time.monotonic()
+            with self.pool.acquire() as session:
+                started = time.monotonic()
+                metrics.observe("queue", started - waited)
+                with metrics.lock:
+                    metrics.queued -= 1
+                    metrics.busy += 1
+                try:
+                    yield session
+                finally:
+                    with metrics.lock:
+                        metrics.busy -= 1
+                        metrics.busy_time += time.monotonic() - started
+        finally:
+            self.slots.release()
+
+    def params(self, path: Path) -> Any:
+        if (params := lookup_schema(path)) is None:
+            with self.worker() as session:
+                params = Evaluation(path, session).start_params()
+        return params
+
+    def execute(
+        self, path: Path, res_params: list[ParameterValueResponse], suffix: str
+    ) -> bytes:
+        with tempfile.TemporaryDirectory() as tmp, self.worker() as session:
+            out = Path(tmp) / f"result.{suffix}"
+            started = time.monotonic()
+            evaluation = Evaluation(path, session)
+            evaluation.start()
+            finishing = time.monotonic()
+            self.metrics.observe("start", finishing - started)
+            # Includes the export, which the worker performs
+            evaluation.finish(res_params, [ExportTarget(out)])
+            self.metrics.observe("finish", time.monotonic() - finishing)
+            for phase, seconds in evaluation.timings.items():
+                if phase not in ("start", "finish"):
+                    self.metrics.observe(phase, seconds)
+            return out.read_bytes()
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    server: EvaluationServer
+
+    def _send(self, status: HTTPStatus, body: bytes, content_type: str):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if status == HTTPStatus.SERVICE_UNAVAILABLE:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.metrics.count(status)
+
+    def _send_json(self, status: HTTPStatus, obj: Any):
+        body = JSONCustomEncoder(ensure_ascii=False).encode(obj).encode()
+        self._send(status, body, "application/json")
+
+    def _handle(self, method: str):
+        url = urlparse(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            match method, url.path:
+                case "GET", "/metrics":
+                    self._send_json(HTTPStatus.OK, self.server.metrics.describe())
+                case "GET", "/params":
+                    path = self.server.design(query.get("design"))
+                    self._send_json(HTTPStatus.OK, self.server.params(path))
+                case "POST", "/execute":
+                    length = int(self.headers.get("Content-Length", 0))
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                    if not isinstance(request, dict):
+                        raise HTTPError(HTTPStatus.BAD_REQUEST, "Expected an object")
+                    path = self.server.design(request.get("design"))
+                    res_params = [
+                        from_dict(ParameterValueResponse, p)
+                        for p in request.get("parameters", [])
+                    ]
+                    # Becomes part of a file name in the worker
+                    if (suffix := request.get("format", "step")) not in FORMATS:
+                        raise HTTPError(
+                            HTTPStatus.BAD_REQUEST, f"Unknown format {suffix}"
+                        )
+                    data = self.server.execute(path, res_params, suffix)
+                    self._send(HTTPStatus.OK, data, "application/octet-stream")
+                case _:
+                    raise HTTPError(HTTPStatus.NOT_FOUND, f"No route {url.path}")
+        except HTTPError as e:
+            self._send_json(e.status, {"error": str(e)})
+        except DesignError as e:
+            self._send_json(HTTPStatus.UNPROCESSABLE_ENTITY, {"error": str(e)})
+        except WorkerError as e:
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)})
+        except (ValueError, TypeError, LookupError, DaciteError) as e:
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+
+def serve(host: str, port: int, root: Path, workers: int | None, queue_size: int):
+    with SessionPool(workers) as pool:
+        server = EvaluationServer((host, port), pool, root, queue_size)
+        print(f"Serving designs in {server.root} on http://{host}:{port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
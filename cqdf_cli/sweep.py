@@ -0,0 +1,219 @@
+import csv
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import product
+from pathlib import Path
+from typing import Any, Iterable, TextIO
+
+from cqdf.driver import Evaluation, Session, SessionPool
+from cqdf.interface import ExportTarget, ParameterValue, ParameterValueResponse
+from cqdf.parameter import Choice, PType, Range, VType
+from cqdf.util import JSONCustomEncoder
+from cqdf.validate import Validator
+
+ParameterSet = dict[str, Any]
+
+
+def parse_value(vtype: VType, raw: Any) -> Any:
+    """
+    Converts a raw value from the command line or a file to the parameter's type
+    """
+    if not isinstance(raw, str):
+        return float(raw) if vtype == VType.Float and isinstance(raw, int) else raw
+    if vtype == VType.Bool:
+        if raw.lower() in ("1", "true", "yes", "on"):
+            return True
+        if raw.lower() in ("0", "false", "no", "off"):
+            return False
+        raise ValueError(f"Invalid boolean '{raw}'")
+    return vtype.value(raw)
+
+
+def _steps(start: float, end: float, step: float, vtype: VType) -> list[Any]:
+    if step <= 0:
+        raise ValueError(f"Step has to be positive, but was {step}")
+    if vtype == VType.Int and not step.is_integer():
+        # Would truncate to the same value several times
+        raise ValueError(
+            f"Step of an integer parameter has to be whole, but was {step}"
+        )
+    count = int((end - start) / step + 1e-9) + 1
+    return [vtype.value(start + i * step) for i in range(count)]
+
+
+def axis_values(param: ParameterValue, spec: str) -> list[Any]:
+    """
+    Expands a grid axis specification of a parameter:
+    `*` for all choices (or both toggle states), `start:end:step` for a stepped
+    range (start and end default to the bounds of a `Range`) or a comma separated list.
+    """
+    value = param.value
+    if spec == "*":
+        if isinstance(value, Choice):
+            return list(value.allowed)  # type: ignore
+        if param.ptype == PType.Toggle:
+            return [False, True]
+        raise ValueError(f"Parameter {param.key} has no enumerable values")
+
+    if ":" in spec:
+        parts = spec.split(":")
+        if len(parts) != 3:
+            raise ValueError(f"Invalid range '{spec}', expected start:end:step")
+        bounds = (value.start, value.end) if isinstance(value, Range) else (None, None)
+        start, end = (
+            parse_value(value.vtype, part) if part else bound
+            for part, bound in zip(parts[:2], bounds)
+        )
+        if start is None or end is None:
+            raise ValueError(f"Parameter {param.key} needs explicit bounds")
+        return _steps(start, end, float(parts[2]), value.vtype)
+
+    return [parse_value(value.vtype, part) for part in spec.split(",")]
+
+
+def read_sets(path: Path) -> list[ParameterSet]:
+    """Reads parameter sets from a CSV file with a header row or a JSONL file"""
+    with path.open(newline="") as f:
+        if path.suffix == ".csv":
+            return [dict(row) for row in csv.DictReader(f)]
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def expand(
+    params: list[ParameterValue], grid: Iterable[str], sets: list[ParameterSet]
+) -> list[ParameterSet]:
+    """
+    Builds the cartesian product of all grid axes (`key=spec`), combined with every
+    explicit parameter set. Parameters not set otherwise keep their default.
+    """
+    by_key = {p.key: p for p in params}
+    defaults: ParameterSet = {p.key: p.value.value for p in params}
+
+    axes: list[tuple[str, list[Any]]] = []
+    for entry in grid:
+        key, sep, spec = entry.partition("=")
+        if not sep:
+            raise ValueError(f"Invalid grid axis '{entry}', expected key=values")
+        if key not in by_key:
+            raise LookupError(f"Unknown parameter {key}")
+        axes.append((key, axis_values(by_key[key], spec)))
+
+    base_sets: list[ParameterSet] = []
+    for parameter_set in sets or [{}]:
+        unknown = set(parameter_set) - set(by_key)
+        if unknown:
+            raise LookupError(f"Unknown parameters {unknown}")
+        base_sets.append(
+            defaults
+            | {
+                k: parse_value(by_key[k].value.vtype, v)
+                for k, v in parameter_set.items()
+            }
+        )
+
+    return [
+        base | dict(zip((key for key, _ in axes), combination))
+        for base in base_sets
+        for combination in product(*(values for _, values in axes))
+    ]
+
+
+def output_path(template: str, index: int, values: ParameterSet) -> str:
+    """Fills the output template with the index and values of a parameter set"""
+    return template.format_map({**values, "index": index})
+
+
+def check_template(template: str, params: list[ParameterValue]):
+    """Raises a ValueError if the output template can't be filled for the design"""
+    try:
+        output_path(template, 0, {p.key: p.value.value for p in params})
+    except (LookupError, ValueError, TypeError, AttributeError) as e:
+        raise ValueError(
+            f"Invalid output template '{template}': {type(e).__name__}: {e}. "
+            + "Use `{index}` and names of parameters."
+        ) from e
+
+
+def _export(session: Session, path: Path, values: ParameterSet, out: Path):
+    evaluation = Evaluation(path, session)
+    evaluation.start()
+    # Local workers write the file, the shape never leaves them
+    evaluation.finish(
+        [ParameterValueResponse(k, v) for k, v in values.items()],
+        [ExportTarget(out.absolute())],
+    )
+
+
+def _evaluate(
+    pool: SessionPool,
+    path: Path,
+    values: ParameterSet,
+    out: Path,
+):
+    # Repeated on another worker if a worker node is lost
+    pool.run(lambda session: _export(session, path, values, out))
+
+
+def run_sweep(
+    pool: SessionPool,
+    path: Path,
+    params: list[ParameterValue],
+    sets: list[ParameterSet],
+    template: str,
+    manifest: TextIO,
+):
+    """
+    Evaluates all parameter sets on the pool, each worker writes its result as soon
+    as it is done. Every completed set is recorded as one JSON line in `manifest`.
+    Sets the design would reject, or whose output path can't be built, are recorded
+    without being evaluated.
+    """
+    check_template(template, params)
+    encoder = JSONCustomEncoder(ensure_ascii=False)
+
+    valid: list[tuple[int, ParameterSet, str]] = []
+    for index, (values, result) in enumerate(
+        zip(sets, Validator(params).validate_many(sets))
+    ):
+        if not isinstance(result, Exception):
+            try:
+                valid.append((index, result, output_path(template, index, result)))
+                continue
+            except (LookupError, ValueError, TypeError, AttributeError) as e:
+                result = e
+        record = {
+            "index": index,
+            "parameters": values,
+            "output": None,
+            "elapsed": 0.0,
+            "error": f"{type(result).__name__}: {result}",
+        }
+        manifest.write(encoder.encode(record) + "\n")
+    manifest.flush()
+
+    with ThreadPoolExecutor(max_workers=pool.size) as executor:
+        started = time.perf_counter()
+        futures = {
+            executor.submit(_evaluate, pool, path, values, Path(output)): (
+                index,
+                values,
+                output,
+            )
+            for index, values, output in valid
+        }
+        for future in as_completed(futures):
+            index, values, output = futures[future]
+            record: dict[str, Any] = {
+                "index": index,
+                "parameters": values,
+                "output": output,
+                "elapsed": round(time.perf_counter() - started, 3),
+            }
+            try:
+                future.result()
+            except Exception as e:
+                record["output"] = None
+                record["error"] = f"{type(e).__name__}: {e}"
+            manifest.write(encoder.encode(record) + "\n")
+            manifest.flush()
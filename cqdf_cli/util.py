@@ -1,4 +1,8 @@
-from cqdf.interface import ParameterValue
+import os
+from pathlib import Path
+
+from cqdf.interface import ExportTarget, ParameterValue
+from cqdf.node import Address, parse_address
 from rich.table import Table
 
 
@@ -28,3 +32,80 @@ def describe_parameters(params: list[ParameterValue]):
         )
 
     return table
+
+
+PHASES = (
+    ("spawn", "Worker start"),
+    ("import", "Import"),
+    ("user_input", "Parameter exchange"),
+    ("build", "Build"),
+    ("serialize", "Serialize"),
+    ("tessellate", "Tessellate"),
+    ("export", "Export"),
+    ("send", "Send"),
+    ("receive", "Receive"),
+)
+
+
+def describe_timings(timings: dict[str, float]):
+    table = Table(title="Timings")
+
+    table.add_column("Phase", style="cyan")
+    table.add_column("Time", justify="right")
+
+    for key, name in PHASES:
+        if key in timings:
+            table.add_row(name, f"{timings[key] * 1e3:.2f} ms")
+    total = timings.get("start", 0.0) + timings.get("finish", 0.0)
+    table.add_row("Total", f"{total * 1e3:.2f} ms", style="bold")
+
+    return table
+
+
+def _per_format(specs: list[str]) -> dict[str | None, float]:
+    values: dict[str | None, float] = {}
+    for spec in specs:
+        fmt, sep, value = spec.rpartition("=")
+        values[fmt.lower() if sep else None] = float(value)
+    return values
+
+
+def export_targets(
+    paths: list[Path], tolerances: list[str], angular_tolerances: list[str]
+) -> list[ExportTarget]:
+    """
+    Builds export targets from output paths and tolerance specifications of the
+    form `value` (all formats) or `format=value`
+    """
+    linear = _per_format(tolerances)
+    angular = _per_format(angular_tolerances)
+
+    targets: list[ExportTarget] = []
+    for path in paths:
+        target = ExportTarget(path.absolute())
+        fmt = path.suffix.removeprefix(".").lower()
+        target.tolerance = linear.get(fmt, linear.get(None, target.tolerance))
+        target.angular_tolerance = angular.get(
+            fmt, angular.get(None, target.angular_tolerance)
+        )
+        targets.append(target)
+    return targets
+
+
+AUTHKEY_ENV = "CQDF_AUTHKEY"
+
+
+def read_authkey() -> bytes:
+    """Key shared by the driver and its worker nodes, read from the environment"""
+    if not (authkey := os.environ.get(AUTHKEY_ENV)):
+        raise ValueError(f"Set {AUTHKEY_ENV} to the key shared with the worker nodes")
+    return authkey.encode()
+
+
+def parse_nodes(specs: list[str]) -> list[tuple[Address, int]]:
+    """Parses worker nodes given as `address` or `address*workers`"""
+    nodes: list[tuple[Address, int]] = []
+    for spec in specs:
+        address, _, workers = spec.partition("*")
+        nodes.append((parse_address(address), int(workers or 1)))
+    return nodes
@@ -0,0 +1,137 @@
+import ast
+import hashlib
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable
+
+from cqdf.cq_serialize import dump_shape
+from cqdf.driver import Evaluation, Session
+from cqdf.interface import ParameterValue, ParameterValueResponse
+from rich.console import Console
+
+if TYPE_CHECKING:
+    from cadquery import Shape
+
+console = Console()
+
+
+def local_dependencies(path: Path) -> set[Path]:
+    """
+    Returns the design file and all modules next to it that it imports, recursively
+    """
+    root = path.parent
+    found: set[Path] = set()
+    pending = [path.absolute()]
+    while pending:
+        current = pending.pop()
+        if current in found:
+            continue
+        found.add(current)
+        try:
+            tree = ast.parse(current.read_text())
+        except (OSError, SyntaxError):
+            continue
+
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                base = root.joinpath(*name.split("."))
+                for candidate in (base.with_suffix(".py"), base / "__init__.py"):
+                    if candidate.is_file():
+                        pending.append(candidate.absolute())
+    return found
+
+
+def _snapshot(paths: set[Path]) -> dict[Path, int]:
+    stamps: dict[Path, int] = {}
+    for path in paths:
+        try:
+            stamps[path] = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            stamps[path] = 0
+    return stamps
+
+
+def wait_for_change(paths: set[Path], interval: float, debounce: float) -> set[Path]:
+    """
+    Blocks until any of the files changed and no further change happened for
+    `debounce` seconds. Returns the changed files.
+    """
+    initial = _snapshot(paths)
+    current = initial
+    while current == initial:
+        time.sleep(interval)
+        current = _snapshot(paths)
+
+    # Editors often write in several steps, wait until the files settle
+    settled = current
+    while True:
+        time.sleep(debounce)
+        current = _snapshot(paths)
+        if current == settled:
+            break
+        settled = current
+    return {p for p in paths if initial[p] != current[p]}
+
+
+def _evaluate(
+    path: Path, session: Session, res_params: list[ParameterValueResponse]
+) -> "Shape | None":
+    evaluation = Evaluation(path, session)
+    params = evaluation.start()
+    # Parameters removed from the design since the last run are dropped
+    keys = {p.key for p in params}
+    return evaluation.finish([r for r in res_params if r.key in keys])
+
+
+def watch(
+    path: Path,
+    out: Path,
+    parse_params: Callable[[list[ParameterValue]], list[ParameterValueResponse]],
+    interval: float = 0.1,
+    debounce: float = 0.2,
+):
+    """
+    Evaluates the design whenever it or one of its local imports changes, keeping a
+    warm session between runs. The output is only rewritten if the shape changed.
+    """
+    session = Session().__enter__()
+    try:
+        evaluation = Evaluation(path, session)
+        res_params = parse_params(evaluation.start())
+        shape = evaluation.finish(res_params)
+        digest = None
+
+        while True:
+            if shape is not None:
+                # Already loaded to receive the shape
+                from cadquery import exporters
+
+                new_digest = hashlib.sha256(dump_shape(shape)).digest()
+                if new_digest != digest:
+                    exporters.export(shape, str(out))  # type: ignore
+                    digest = new_digest
+                    console.log(f"Wrote {out}")
+                else:
+                    console.log("Result unchanged")
+
+            changed = wait_for_change(local_dependencies(path), interval, debounce)
+            console.log(f"Changed: {', '.join(p.name for p in changed)}")
+
+            started = time.perf_counter()
+            try:
+                shape = _evaluate(path, session, res_params)
+            except Exception as e:
+                console.log(f"[red]Evaluation failed:[/red] {type(e).__name__}: {e}")
+                session.__exit__(None, None, None)
+                session = Session().__enter__()
+                shape = None
+            else:
+                console.log(f"Evaluated in {time.perf_counter() - started:.2f}s")
+    finally:
+        session.__exit__(None, None, None)
@@ -1,9 +1,11 @@
 import cadquery as cq
 import OCP
-from cqdf.design import finish, user_input
+from cqdf.design import finish, session_cache, step, user_input
 from cqdf.parameter import Choice, DesignParameters, Numeric, Text, Unit
 
 
+# Walking the font manager is slow, the fonts are only looked up once per worker
+@session_cache
 def get_font_names() -> list[str]:
     """
     Utility function to get all OCP supported fonts
@@ -31,14 +33,20 @@ class LabelParams(DesignParameters):
 
 params = user_input(LabelParams)  # Instantiate
 
-# Generate the text shape
-text = cq.Workplane().text(
-    params.string.value,
-    params.size.value,
-    -params.thickness.value / 2,
-    font=params.font.value,
-    kind=params.font_style.value,  # type: ignore
-)
+
+# Generate the text shape. As a step, it is only rebuilt if a parameter it reads changes
+@step
+def make_text(params: LabelParams):
+    return cq.Workplane().text(
+        params.string.value,
+        params.size.value,
+        -params.thickness.value / 2,
+        font=params.font.value,
+        kind=params.font_style.value,  # type: ignore
+    )
+
+
+text = make_text(params)
 
 # Generate a base-shape and subtract the text
 bb = text.findSolid().BoundingBox()